@@ -1,94 +1,371 @@
 # CheckDuplicateGestures.py
 
+import time
+import threading
+import concurrent.futures
 import wx
 import gui
-import inputCore
 import config
+import api
+import globalPluginHandler
 from logHandler import log
 import ui
-from typing import List, Dict, Set, Tuple
+from typing import Callable, List, Dict, Tuple, Optional
 import addonHandler
+from .gestureIndex import GestureMappingIndex
+from .conflictIndex import ConflictIndex, ScriptSnapshot
+from .conflictGraph import (
+	ConflictGraph, KIND_BRAILLE_DISPLAY, KIND_GLOBAL_COMMANDS, KIND_VISION_PROVIDER,
+	SEVERITY_AMBIGUOUS, SEVERITY_BENIGN, SEVERITY_SHADOWING,
+)
+from .resolution import (
+	ResolutionTable,
+	STATUS_DEAD, STATUS_RUNS, STATUS_RUNS_SOMETIMES, STATUS_SHADOWED, STATUS_UNDECIDED,
+)
+from .records import GestureBinding
+from .analysis import (
+	DEFAULT_LAYOUTS, GestureNormalizer, find_duplicates, mappings_fingerprint, snapshot_from_entries,
+)
+from .addonIndex import addons_signature
+from . import instrumentation, scanSnapshot
+from .displayText import get_context, get_gesture_display
+from .tokenIndex import TokenIndex
 try:
 	addonHandler.initTranslation()
 except addonHandler.AddonError:
 	log.warning("Unable to init translations.")
 
-def _normalize_gesture(gesture: str) -> str:
-	"""Normalize a gesture string by removing keyboard layout information."""
-	norm_gesture = gesture
+def _get_known_layouts() -> List[str]:
+	"""Return every keyboard layout name a gesture identifier may be qualified with."""
+	layouts = list(DEFAULT_LAYOUTS)
 	try:
-		if 'keyboard' in config.conf and 'keyboardLayout' in config.conf['keyboard']:
-			keyboard_layout = config.conf['keyboard']['keyboardLayout']
-			if keyboard_layout:
-				layout_str = f"({keyboard_layout})"
-				norm_gesture = norm_gesture.replace(layout_str, "")
+		import keyboardHandler
+		layouts.extend(getattr(keyboardHandler.KeyboardInputGesture, 'LAYOUTS', ()))
 	except Exception as e:
-		log.debug(f"Normalization skipped for {gesture}: {e}")
-	return norm_gesture
+		log.debug(f"Unable to read keyboard layouts: {e}")
+	try:
+		current = config.conf['keyboard']['keyboardLayout']
+		if current:
+			layouts.append(current)
+	except Exception as e:
+		log.debug(f"Unable to read the active keyboard layout: {e}")
+	return layouts
+
+def build_normalizer() -> GestureNormalizer:
+	"""Build the gesture normalizer for one scan from the running NVDA's layouts."""
+	return GestureNormalizer(_get_known_layouts())
+
+# Minimum delay between two spoken progress reports, in seconds
+_PROGRESS_INTERVAL = 2.0
+# From this many duplicate entries on, the dialog starts with only actionable conflicts shown
+_ACTIONABLE_ONLY_ROWS = 200
+
+_SEVERITY_LABELS = {
+	SEVERITY_SHADOWING: _("Shadowing"),
+	SEVERITY_AMBIGUOUS: _("Ambiguous"),
+	SEVERITY_BENIGN: _("Benign"),
+}
 
-def find_duplicate_gestures_data() -> List[Dict]:
-	"""Scans all registered gestures to find duplicates."""
-	all_gestures = []
-	seen_keys: Set[Tuple[str, str, str]] = set()
+_STATUS_LABELS = {
+	STATUS_RUNS: _("Runs"),
+	STATUS_RUNS_SOMETIMES: _("Runs in some places"),
+	STATUS_SHADOWED: _("Hidden for some objects"),
+	STATUS_DEAD: _("Never runs"),
+	STATUS_UNDECIDED: _("Depends on load order"),
+}
 
+def snapshot_mappings(index: Optional[GestureMappingIndex] = None) -> List[ScriptSnapshot]:
+	"""Copy the mappings into plain tuples so they can be scanned off the main thread.
+	Must be called on the main thread, as it reads live script info objects.
+	"""
+	if index is None:
+		index = GestureMappingIndex.build()
+	return snapshot_from_entries(index.entries)
+
+def find_duplicate_gestures_data(index: Optional[GestureMappingIndex] = None) -> List[GestureBinding]:
+	"""Scans all registered gestures to find duplicates.
+	An already built mapping index may be passed in to avoid fetching the mappings again.
+	"""
 	try:
-		all_mappings = inputCore.manager.getAllGestureMappings()
-		for category, scripts in all_mappings.items():
-			for script_name, script_info in scripts.items():
-				if not hasattr(script_info, 'gestures'):
-					continue
-				for gesture in script_info.gestures:
-					try:
-						norm = _normalize_gesture(gesture)
-						class_name = getattr(script_info, 'className', "Unknown")
-						unique_key = (norm, script_name, class_name)
-						if unique_key in seen_keys:
-							continue
-						seen_keys.add(unique_key)
-						all_gestures.append({
-							'gesture': gesture,
-							'norm_gesture': norm,
-							'category': category,
-							'displayName': getattr(script_info, 'displayName', script_name),
-							'className': class_name,
-							'scriptName': script_name
-						})
-					except:
-						continue
+		return find_duplicates(snapshot_mappings(index), build_normalizer()) or []
 	except Exception as e:
 		log.error(f"Critical error scanning gestures: {e}")
+		return []
+
+# Kept for the whole session and updated incrementally between two checks
+conflict_index = ConflictIndex()
+
+def _get_vision_providers() -> List[str]:
+	"""Return the ids of the running vision enhancement providers."""
+	try:
+		import vision
+		return [info.providerId for info in vision.handler.getActiveProviderInfos()]
+	except Exception as e:
+		log.debug(f"Unable to read vision providers for signature: {e}")
+		return []
+
+def mappings_signature() -> Tuple:
+	"""Fingerprint of everything the gesture mappings depend on.
+	Covers saved user gestures, installed add-ons, running global plugins,
+	the focused application and object class, the braille display driver
+	and the vision enhancement providers.
+	"""
+	focus_key = ()
+	try:
+		focus = api.getFocusObject()
+		app_module = getattr(focus, 'appModule', None)
+		focus_key = (type(focus).__name__, getattr(app_module, 'appName', ""), type(app_module).__module__)
+	except Exception as e:
+		log.debug(f"Unable to read focus for signature: {e}")
+	braille_display = ""
+	try:
+		braille_display = config.conf["braille"]["display"]
+	except Exception as e:
+		log.debug(f"Unable to read braille display for signature: {e}")
+	return mappings_fingerprint(
+		scanSnapshot.file_key("gestures.ini"),
+		addons_signature(),
+		(type(plugin).__module__ for plugin in globalPluginHandler.runningPlugins),
+		focus_key,
+		braille_display,
+		_get_vision_providers(),
+	)
+
+def _on_mappings_changed(*args, **kwargs):
+	conflict_index.mark_dirty()
+
+def _get_change_extension_points() -> List:
+	"""Extension points after which the gesture mappings may have changed."""
+	points = [getattr(config, 'post_configProfileSwitch', None)]
+	try:
+		import appModuleHandler
+		points.append(getattr(appModuleHandler, 'post_appSwitch', None))
+	except ImportError:
+		pass
+	return [point for point in points if point is not None]
+
+def register_change_handlers():
+	for point in _get_change_extension_points():
+		point.register(_on_mappings_changed)
+
+def unregister_change_handlers():
+	for point in _get_change_extension_points():
+		try:
+			point.unregister(_on_mappings_changed)
+		except Exception as e:
+			log.debug(f"Error unregistering handler: {e}")
+
+# A single worker thread is enough: scans are started by the user one at a time
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+	global _executor
+	if _executor is None:
+		_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="gestureDuplicate")
+	return _executor
+
+def shutdown_executor():
+	"""Stop the background worker. Called when the plugin terminates."""
+	global _executor
+	if _executor is not None:
+		_executor.shutdown(wait=False, cancel_futures=True)
+		_executor = None
+
+class DuplicateScanWorker:
+	"""Updates the conflict index on a background thread.
+
+	When nothing the mappings depend on changed since the last check, the
+	duplicates are read straight from the conflict index, or from the on-disk
+	snapshot of a previous session. Otherwise the mappings are snapshotted on
+	the main thread, the index is updated incrementally on the worker, progress
+	is spoken through ui.message, the result is saved as the new snapshot and
+	handed back to on_done on the main thread with wx.CallAfter, unless cancelled.
+	"""
+
+	def __init__(self, on_done: Callable[[List[GestureBinding]], None], timing=None):
+		self._on_done = on_done
+		self._timing = timing or instrumentation.start_run("Duplicate scan")
+		self._cancel_event = threading.Event()
+		self._last_progress = 0.0
+		self._future: Optional[concurrent.futures.Future] = None
+
+	def start(self, index: Optional[GestureMappingIndex] = None):
+		signature = mappings_signature()
+		if index is None and conflict_index.is_fresh(signature):
+			with self._timing.stage("conflict index read") as stage:
+				duplicates = conflict_index.duplicates()
+				stage.count = len(duplicates)
+			wx.CallAfter(self._deliver, duplicates)
+			return
+		# Keyed on the layout and language rather than nvda.ini, which NVDA rewrites on every exit
+		snapshot_key = scanSnapshot.make_key(signature, get_context())
+		if index is None:
+			with self._timing.stage("snapshot read") as stage:
+				stored = scanSnapshot.load("duplicates", snapshot_key, GestureBinding)
+				stage.count = len(stored or ())
+			if stored is not None:
+				wx.CallAfter(self._deliver, stored)
+				return
+		# Read before the snapshot, so changes made while the worker runs keep the index dirty
+		generation = conflict_index.generation
+		with self._timing.stage("mapping fetch") as stage:
+			snapshot = snapshot_mappings(index)
+			stage.count = len(snapshot)
+		normalize = build_normalizer()
+		self._last_progress = time.monotonic()
+		self._future = _get_executor().submit(self._run, snapshot, normalize, signature, snapshot_key, generation)
+
+	def cancel(self):
+		self._cancel_event.set()
+		if self._future is not None:
+			self._future.cancel()
+
+	@property
+	def cancelled(self) -> bool:
+		return self._cancel_event.is_set()
+
+	def _report_progress(self, done: int, total: int):
+		now = time.monotonic()
+		if now - self._last_progress < _PROGRESS_INTERVAL or not total or self.cancelled:
+			return
+		self._last_progress = now
+		percent = done * 100 // total
+		wx.CallAfter(ui.message, _("Scanning gestures {}%").format(percent))
+
+	def _run(
+			self,
+			snapshot: List[ScriptSnapshot],
+			normalize: Callable[[str], str],
+			signature: Tuple,
+			snapshot_key: str,
+			generation: int
+	):
+		try:
+			with self._timing.stage("normalization and indexing", len(snapshot)):
+				if not conflict_index.update(
+					snapshot, normalize, signature,
+					cancel_event=self._cancel_event, progress=self._report_progress,
+					generation=generation
+				):
+					return
+			with self._timing.stage("counting and sorting") as stage:
+				duplicates = conflict_index.duplicates()
+				stage.count = len(duplicates)
+			with self._timing.stage("snapshot write", len(duplicates)):
+				scanSnapshot.save("duplicates", snapshot_key, duplicates)
+		except Exception as e:
+			log.error(f"Critical error scanning gestures: {e}")
+			conflict_index.mark_dirty()
+			duplicates = []
+		if not self.cancelled:
+			wx.CallAfter(self._deliver, duplicates)
+
+	def _deliver(self, duplicates: List[GestureBinding]):
+		if not self.cancelled:
+			self._on_done(duplicates)
+
+def _strip_separators(text: str) -> str:
+	return text.replace(';', '').replace(':', '')
+
+class DuplicatesListCtrl(wx.ListCtrl):
+	"""Virtual report list backed by the duplicates array.
+	Row texts are only computed when a row is first shown and are then memoized.
+	"""
+
+	def __init__(self, parent, get_row_texts: Callable[[int], Tuple[str, ...]]):
+		super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL | wx.BORDER_SUNKEN)
+		self._get_row_texts = get_row_texts
+		self._row_cache: Dict[int, Tuple[str, ...]] = {}
+
+	def set_rows(self, count: int):
+		self._row_cache.clear()
+		self.SetItemCount(count)
+		self.Refresh()
 
-	counts: Dict[str, int] = {}
-	for g in all_gestures:
-		n = g['norm_gesture']
-		counts[n] = counts.get(n, 0) + 1
+	def _get_row(self, item: int) -> Optional[Tuple[str, ...]]:
+		row = self._row_cache.get(item)
+		if row is None:
+			try:
+				row = self._row_cache[item] = self._get_row_texts(item)
+			except IndexError:
+				return None
+		return row
 
-	duplicates = [g for g in all_gestures if counts[g['norm_gesture']] > 1]
-	duplicates.sort(key=lambda x: x['norm_gesture'])
-	return duplicates
+	def prefetch_visible(self) -> int:
+		"""Compute the texts of the rows on screen in one batch. Returns how many were computed."""
+		first = max(self.GetTopItem(), 0)
+		last = min(first + self.GetCountPerPage() + 1, self.GetItemCount())
+		missing = [item for item in range(first, last) if item not in self._row_cache]
+		for item in missing:
+			self._get_row(item)
+		return len(missing)
+
+	def OnGetItemText(self, item: int, column: int) -> str:
+		row = self._get_row(item)
+		return "" if row is None else row[column]
 
 class DuplicateGesturesDialog(wx.Dialog):
-	def __init__(self, parent, duplicates: List[Dict]):
+	def __init__(self, parent, duplicates: Optional[List[GestureBinding]] = None):
+		"""Show the given duplicates, or an empty list to be filled by start_scan()."""
 		super().__init__(parent, title=_("Duplicate Gestures"), size=(800, 500))
-		self.duplicates = duplicates
+		self.duplicates: List[GestureBinding] = duplicates or []
+		self.graph = ConflictGraph(self.duplicates)
+		self.resolution = ResolutionTable(self.graph)
+		# Indices into duplicates of the rows currently shown
+		self.view: List[int] = list(range(len(self.duplicates)))
+		# Built on the first use of the filter box
+		self._filter_index: Optional[TokenIndex] = None
 		self.selected_item_index = -1
+		self._worker: Optional[DuplicateScanWorker] = None
+		self.timing = instrumentation.start_run("Check duplicates dialog")
 		self.SetEscapeId(wx.ID_CLOSE)
 		self._setup_ui()
-		self.Bind(wx.EVT_CLOSE, lambda e: self.Destroy())
+		self.Bind(wx.EVT_CLOSE, self.onClose)
+
+	def start_scan(self, index: Optional[GestureMappingIndex] = None):
+		"""Scan for duplicates in the background and fill the list when done."""
+		self.instructions.SetLabel(_("Scanning gestures, please wait..."))
+		self._worker = DuplicateScanWorker(self.set_duplicates, self.timing)
+		self._worker.start(index)
+
+	def set_duplicates(self, duplicates: List[GestureBinding]):
+		self._worker = None
+		self.duplicates = duplicates
+		self._filter_index = None
+		with self.timing.stage("conflict graph", len(duplicates)):
+			self.graph = ConflictGraph(duplicates)
+		with self.timing.stage("resolution", len(self.graph.nodes)):
+			self.resolution = ResolutionTable(self.graph)
+		if len(duplicates) >= _ACTIONABLE_ONLY_ROWS:
+			self.actionableCheck.SetValue(True)
+		self.selected_item_index = -1
+		self.openBtn.Disable()
+		self._update_instructions()
+		self._populate_list()
+		ui.message(self.instructions.GetLabel())
+
+	def onClose(self, event):
+		# Stop a running scan so its result is never delivered to a destroyed dialog
+		if self._worker is not None:
+			self._worker.cancel()
+			self._worker = None
+		self.timing.finish()
+		self.Destroy()
 
 	def _get_gesture_display(self, gesture: str) -> str:
-		try:
-			display_text = inputCore.getDisplayTextForGestureIdentifier(gesture)
-			if display_text and len(display_text) >= 2:
-				return display_text[1]
-		except:
-			pass
-		return gesture
+		return get_gesture_display(gesture)
 
 	def _get_context_display(self, class_name: str) -> str:
 		"""Clean and improve context name display"""
 		if class_name == "Unknown":
 			return _("Unknown")
+		context = self.graph.context_of(class_name)
+		if context.kind == KIND_GLOBAL_COMMANDS:
+			return _("Global Commands")
+		if context.kind == KIND_BRAILLE_DISPLAY:
+			return _("Braille display: ") + context.scope
+		if context.kind == KIND_VISION_PROVIDER:
+			return _("Vision provider: ") + context.scope
 		if class_name.startswith("globalPlugins."):
 			parts = class_name.split(".")
 			if len(parts) >= 2:
@@ -102,14 +379,28 @@ class DuplicateGesturesDialog(wx.Dialog):
 	def _setup_ui(self):
 		main_sizer = wx.BoxSizer(wx.VERTICAL)
 
-		txt = _("Found {} duplicate entries. Select an item and click 'Open' to fix.").format(len(self.duplicates))
-		instructions = wx.StaticText(self, label=txt)
-		main_sizer.Add(instructions, 0, wx.ALL, 10)
+		self.instructions = wx.StaticText(self)
+		self._update_instructions()
+		main_sizer.Add(self.instructions, 0, wx.ALL, 10)
+
+		filter_sizer = wx.BoxSizer(wx.HORIZONTAL)
+		filter_sizer.Add(wx.StaticText(self, label=_("&Filter:")), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+		self.filterCtrl = wx.TextCtrl(self)
+		self.filterCtrl.Bind(wx.EVT_TEXT, self.onFilterChanged)
+		filter_sizer.Add(self.filterCtrl, 1)
+		main_sizer.Add(filter_sizer, 0, wx.LEFT | wx.RIGHT | wx.BOTTOM | wx.EXPAND, 10)
+
+		self.actionableCheck = wx.CheckBox(self, label=_("Show only &actionable conflicts"))
+		self.actionableCheck.SetValue(len(self.duplicates) >= _ACTIONABLE_ONLY_ROWS)
+		self.actionableCheck.Bind(wx.EVT_CHECKBOX, self.onActionableToggled)
+		main_sizer.Add(self.actionableCheck, 0, wx.LEFT | wx.RIGHT, 10)
 
-		self.gesturesList = wx.ListCtrl(self, style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.BORDER_SUNKEN)
+		self.gesturesList = DuplicatesListCtrl(self, self._get_row_texts)
 		self.gesturesList.InsertColumn(0, _("Gesture"), width=150)
-		self.gesturesList.InsertColumn(1, _("Function"), width=350)
-		self.gesturesList.InsertColumn(2, _("Context"), width=250)
+		self.gesturesList.InsertColumn(1, _("Function"), width=250)
+		self.gesturesList.InsertColumn(2, _("Context"), width=170)
+		self.gesturesList.InsertColumn(3, _("Severity"), width=90)
+		self.gesturesList.InsertColumn(4, _("Resolution"), width=140)
 
 		main_sizer.Add(self.gesturesList, 1, wx.ALL | wx.EXPAND, 10)
 
@@ -133,22 +424,71 @@ class DuplicateGesturesDialog(wx.Dialog):
 
 		wx.CallAfter(self.gesturesList.SetFocus)
 
+	def _update_instructions(self):
+		counts = self.graph.counts()
+		txt = _(
+			"Found {entries} duplicate entries: {shadowing} shadowing, {ambiguous} ambiguous "
+			"and {benign} benign gestures, {dead} bindings never run. Select an item and click 'Open' to fix."
+		).format(
+			entries=len(self.duplicates),
+			shadowing=counts[SEVERITY_SHADOWING],
+			ambiguous=counts[SEVERITY_AMBIGUOUS],
+			benign=counts[SEVERITY_BENIGN],
+			dead=self.resolution.dead_count(),
+		)
+		self.instructions.SetLabel(txt)
+
+	def _get_entry_texts(self, item: GestureBinding) -> Tuple[str, str, str]:
+		"""Compute the gesture, function and context texts of a duplicate."""
+		gesture_display = _strip_separators(self._get_gesture_display(item.gesture))
+
+		function_name = item.display_name
+		if function_name.startswith("Function: "):
+			function_name = function_name[10:]
+		function_name = _strip_separators(function_name)
+
+		context_name = _strip_separators(self._get_context_display(item.class_name))
+		return (gesture_display, function_name, context_name)
+
+	def _get_row_texts(self, index: int) -> Tuple[str, str, str, str, str]:
+		"""Compute the gesture, function, context, severity and resolution texts of one row."""
+		item = self.duplicates[self.view[index]]
+		severity = _SEVERITY_LABELS.get(self.graph.severity_of(item), "")
+		status = _STATUS_LABELS.get(self.resolution.status_of(item), "")
+		return self._get_entry_texts(item) + (severity, status)
+
+	def _get_filter_index(self) -> TokenIndex:
+		if self._filter_index is None:
+			with self.timing.stage("filter index", len(self.duplicates)):
+				self._filter_index = TokenIndex(self._get_entry_texts(item) for item in self.duplicates)
+		return self._filter_index
+
 	def _populate_list(self):
-		self.gesturesList.DeleteAllItems()
-		for i, item in enumerate(self.duplicates):
-			gesture_display = self._get_gesture_display(item['gesture'])
-			gesture_display = gesture_display.replace(';', '').replace(':', '')
-			self.gesturesList.InsertItem(i, gesture_display)
-
-			function_name = item['displayName']
-			if function_name.startswith("Function: "):
-				function_name = function_name[10:]
-			function_name = function_name.replace(';', '').replace(':', '')
-			self.gesturesList.SetItem(i, 1, function_name)
-
-			context_name = self._get_context_display(item['className'])
-			context_name = context_name.replace(';', '').replace(':', '')
-			self.gesturesList.SetItem(i, 2, context_name)
+		view = range(len(self.duplicates))
+		query = self.filterCtrl.GetValue()
+		if query.strip():
+			matches = self._get_filter_index().match(query)
+			if matches is not None:
+				view = sorted(matches)
+		if self.actionableCheck.GetValue():
+			view = [index for index in view if self.graph.is_actionable(self.duplicates[index])]
+		self.view = list(view)
+		with self.timing.stage("widget population", len(self.view)):
+			self.gesturesList.set_rows(len(self.view))
+		# Later rows are computed as they scroll into view, outside any stage
+		with self.timing.stage("display text") as stage:
+			stage.count = self.gesturesList.prefetch_visible()
+
+	def _reset_view(self):
+		self.selected_item_index = -1
+		self.openBtn.Disable()
+		self._populate_list()
+
+	def onFilterChanged(self, event):
+		self._reset_view()
+
+	def onActionableToggled(self, event):
+		self._reset_view()
 
 	def onItemSelected(self, event):
 		self.selected_item_index = event.GetIndex()
@@ -169,8 +509,8 @@ class DuplicateGesturesDialog(wx.Dialog):
 		if self.selected_item_index == -1:
 			return
 
-		selected_item = self.duplicates[self.selected_item_index]
-		script_name = selected_item['scriptName']
+		selected_item = self.duplicates[self.view[self.selected_item_index]]
+		script_name = selected_item.script_name
 
 		try:
 			# Use the EXACT method from the old version that shows Add/Remove buttons
@@ -1,22 +1,56 @@
 # CleanConfig.py
 # Part of NVDA Add-on Development (Chai Rules 2026)
 
+import io
 import wx
-import gui
 import config
 import ui
 import addonHandler
 from logHandler import log
+from typing import Any, Dict, List, Optional, Set
+from .iniTransaction import ProfileFilesTransaction, ProfileSectionTransaction
+from .analysis import (
+	SECTION_ADDON, SECTION_ORPHANED, SECTION_REGISTERED,
+	find_unknown_keys, measure_config_sections,
+)
+from .addonIndex import get_installed_addon_index
+from .dryRun import DiffPreview
+from .records import ConfigFinding, ConfigKey, ConfigSection, ProfileOrphan
+from .configValidation import (
+	FINDING_DEFAULT, FINDING_INVALID, FINDING_UNKNOWN,
+	ConfigSpecIndex, validate_profile,
+)
+from .profileScan import get_loaded_profiles, list_profile_files, scan_profiles
+from .previewDialog import confirm_removal, format_size
+from . import instrumentation
 
 addonHandler.initTranslation()
 
+_STATUS_LABELS = {
+	SECTION_REGISTERED: _("in use"),
+	SECTION_ADDON: _("installed add-on"),
+	SECTION_ORPHANED: _("orphaned"),
+}
+
+_FINDING_LABELS = {
+	FINDING_DEFAULT: _("default value"),
+	FINDING_INVALID: _("invalid value"),
+	FINDING_UNKNOWN: _("unknown key"),
+}
+
 class CleanConfigDialog(wx.Dialog):
 	def __init__(self, parent):
 		# STAY_ON_TOP ensured. Added close event binding.
 		super().__init__(parent, title=_("Clean NVDA.ini Sections"), size=(600, 700), 
 						style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER | wx.STAY_ON_TOP)
 		
-		self.sections = []
+		# Sections shown in the list, orphaned and largest first
+		self.sections: List[ConfigSection] = []
+		# Every section of the profile, measured once when the dialog opens
+		self._measured: Optional[List[ConfigSection]] = None
+		# Deletions are queued here and written in one go when the dialog closes
+		self.transaction = ProfileSectionTransaction(config.conf.profiles[0])
+		self.timing = instrumentation.start_run("Clean configuration dialog")
 		self._setup_ui()
 		self._load_sections()
 		
@@ -27,7 +61,10 @@ class CleanConfigDialog(wx.Dialog):
 	def _setup_ui(self):
 		main_sizer = wx.BoxSizer(wx.VERTICAL)
 		
-		info_text = wx.StaticText(self, label=_("Check sections to remove. Press Space to toggle, Delete to remove."))
+		info_text = wx.StaticText(self, label=_(
+			"Orphaned and largest sections are listed first. "
+			"Check sections to remove. Press Space to toggle, Delete to remove."
+		))
 		main_sizer.Add(info_text, 0, wx.ALL, 10)
 
 		self.checkList = wx.CheckListBox(self)
@@ -39,23 +76,67 @@ class CleanConfigDialog(wx.Dialog):
 		
 		self.delBtn = wx.Button(self, label=_("Remove Selected"))
 		self.delBtn.Bind(wx.EVT_BUTTON, lambda e: self.confirm_and_delete())
+
+		self.nestedBtn = wx.Button(self, label=_("&Nested Keys..."))
+		self.nestedBtn.Bind(wx.EVT_BUTTON, self.onNestedKeys)
+
+		self.validateBtn = wx.Button(self, label=_("&Validate..."))
+		self.validateBtn.Bind(wx.EVT_BUTTON, self.onValidate)
+
+		self.profilesBtn = wx.Button(self, label=_("Other &Profiles..."))
+		self.profilesBtn.Bind(wx.EVT_BUTTON, self.onOtherProfiles)
 		
 		# Set ID as wx.ID_CANCEL to automatically handle Escape key
 		self.closeBtn = wx.Button(self, wx.ID_CANCEL, label=_("Close"))
 		self.closeBtn.Bind(wx.EVT_BUTTON, self.onClose)
 
 		btn_sizer.Add(self.delBtn, 0, wx.RIGHT, 10)
+		btn_sizer.Add(self.nestedBtn, 0, wx.RIGHT, 10)
+		btn_sizer.Add(self.validateBtn, 0, wx.RIGHT, 10)
+		btn_sizer.Add(self.profilesBtn, 0, wx.RIGHT, 10)
 		btn_sizer.Add(self.closeBtn, 0)
 		main_sizer.Add(btn_sizer, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
 		
 		self.SetSizer(main_sizer)
 
+	def _measure_sections(self) -> List[ConfigSection]:
+		"""Serialize the base profile and measure each of its sections in one pass."""
+		conf = config.conf.profiles[0]
+		with self.timing.stage("config read") as stage:
+			buffer = io.BytesIO()
+			conf.write(buffer)
+			data = buffer.getvalue()
+			stage.count = len(data)
+		known_sections = set(config.conf.spec.keys())
+		installed_names = get_installed_addon_index().names
+		with self.timing.stage("section measure") as stage:
+			sections = measure_config_sections(data, known_sections, installed_names)
+			stage.count = len(sections)
+		return sections
+
+	def _get_label(self, section: ConfigSection) -> str:
+		return _("{name} | {size} | {keys} keys | depth {depth} | {status}").format(
+			name=section.name,
+			size=format_size(section.size),
+			keys=section.keys,
+			depth=section.depth,
+			status=_STATUS_LABELS.get(section.status, section.status),
+		)
+
 	def _load_sections(self):
 		self.checkList.Clear()
 		try:
-			conf = config.conf.profiles[0]
-			self.sections = sorted([str(k) for k in conf.keys()])
-			self.checkList.AppendItems(self.sections)
+			if self._measured is None:
+				self._measured = self._measure_sections()
+			pending = set(self.transaction.pending)
+			profile = self.transaction.profile
+			# Deletions flushed by an NVDA save in the meantime are gone from the profile
+			self.sections = [
+				section for section in self._measured
+				if section.name not in pending and section.name in profile
+			]
+			with self.timing.stage("widget population", len(self.sections)):
+				self.checkList.AppendItems([self._get_label(section) for section in self.sections])
 		except Exception as e:
 			log.error(f"Error loading config: {e}")
 
@@ -72,8 +153,24 @@ class CleanConfigDialog(wx.Dialog):
 		else:
 			event.Skip()
 
+	def onNestedKeys(self, event):
+		"""Open the cleaner for unknown keys inside the sections NVDA and add-ons register."""
+		NestedKeysDialog(self, self.transaction).Show()
+
+	def onValidate(self, event):
+		"""Open the check of every value against the config spec."""
+		ValidationDialog(self, self.transaction).Show()
+
+	def onOtherProfiles(self, event):
+		"""Open the cleaner for the sections of every other configuration profile."""
+		ProfileCleanupDialog(self).Show()
+
 	def onClose(self, event):
-		"""Properly destroy the dialog to free memory and return focus."""
+		"""Write queued deletions, then destroy the dialog to free memory and return focus."""
+		with self.timing.stage("ini write", self.transaction.pending_count):
+			if not self.transaction.commit():
+				ui.message(_("Failed to save configuration."))
+		self.timing.finish()
 		self.Destroy()
 
 	def confirm_and_delete(self):
@@ -82,14 +179,288 @@ class CleanConfigDialog(wx.Dialog):
 			ui.message(_("No items selected."))
 			return
 
-		selected = [self.checkList.GetString(i) for i in indices]
+		selected = [self.sections[i].name for i in indices]
 		msg = _("Delete {count} sections?").format(count=len(selected))
 		
-		if gui.messageBox(msg, _("Confirm"), wx.YES_NO | wx.ICON_WARNING) == wx.YES:
-			conf = config.conf.profiles[0]
+		if confirm_removal(self, msg, lambda: self.transaction.preview(sections=selected)):
 			for name in selected:
-				if name in conf:
-					del conf[name]
-			config.conf.save()
-			ui.message(_("Removed successfully."))
-			self._load_sections()
\ No newline at end of file
+				self.transaction.queue_removal(name)
+			ui.message(_("Queued for removal. Changes are saved when this dialog closes."))
+			self._load_sections()
+
+class _CleanupListDialog(wx.Dialog):
+	"""Base of the dialogs listing items to check and remove.
+	Subclasses fill self.items in _scan and provide:
+	_get_label(item) -> str, the list entry of an item;
+	_confirm_message(selected) -> str, the question asked before removing;
+	_preview(selected) -> DiffPreview, the diff removing them would make, without writing it;
+	_queue(selected), which queues their removal.
+	"""
+
+	queued_message = _("Queued for removal. Changes are saved when this dialog closes.")
+
+	def __init__(self, parent, title: str, timing_name: str):
+		super().__init__(parent, title=title, size=(600, 500),
+						style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER | wx.STAY_ON_TOP)
+		self.items: List[Any] = []
+		self.timing = instrumentation.start_run(timing_name)
+		self._setup_ui()
+		self.Bind(wx.EVT_CLOSE, self.onClose)
+
+	def _setup_ui(self):
+		main_sizer = wx.BoxSizer(wx.VERTICAL)
+
+		self.info_text = wx.StaticText(self)
+		main_sizer.Add(self.info_text, 0, wx.ALL, 10)
+
+		self.checkList = wx.CheckListBox(self)
+		self.checkList.Bind(wx.EVT_KEY_DOWN, self.onKeyDown)
+		self.checkList.Bind(wx.EVT_CHECKLISTBOX, self.onCheckToggle)
+		main_sizer.Add(self.checkList, 1, wx.ALL | wx.EXPAND, 10)
+
+		btn_sizer = wx.BoxSizer(wx.HORIZONTAL)
+
+		self.delBtn = wx.Button(self, label=_("Remove Selected"))
+		self.delBtn.Bind(wx.EVT_BUTTON, lambda e: self.confirm_and_delete())
+		btn_sizer.Add(self.delBtn, 0, wx.RIGHT, 10)
+		self._add_buttons(btn_sizer)
+
+		self.closeBtn = wx.Button(self, wx.ID_CANCEL, label=_("Close"))
+		self.closeBtn.Bind(wx.EVT_BUTTON, self.onClose)
+		btn_sizer.Add(self.closeBtn, 0)
+		main_sizer.Add(btn_sizer, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
+
+		self.SetSizer(main_sizer)
+
+	def _add_buttons(self, btn_sizer: wx.BoxSizer):
+		"""Add buttons between Remove Selected and Close."""
+
+	def _commit(self):
+		"""Write what was queued. Called when the dialog closes."""
+
+	def _populate(self):
+		with self.timing.stage("widget population", len(self.items)):
+			self.checkList.Set([self._get_label(item) for item in self.items])
+
+	def onCheckToggle(self, event):
+		index = event.GetSelection()
+		name = self.checkList.GetString(index)
+		status = _("checked") if self.checkList.IsChecked(index) else _("not checked")
+		ui.message(f"{name} {status}")
+
+	def onKeyDown(self, event):
+		if event.GetKeyCode() == wx.WXK_DELETE:
+			self.confirm_and_delete()
+		else:
+			event.Skip()
+
+	def _remove(self, selected: List[Any]):
+		"""Ask for confirmation, then queue the selected items and drop them from the list."""
+		if not confirm_removal(self, self._confirm_message(selected), lambda: self._preview(selected)):
+			return
+		self._queue(selected)
+		removed = {id(item) for item in selected}
+		self.items = [item for item in self.items if id(item) not in removed]
+		ui.message(self.queued_message)
+		self._populate()
+
+	def confirm_and_delete(self):
+		indices = self.checkList.GetCheckedItems()
+		if not indices:
+			ui.message(_("No items selected."))
+			return
+		self._remove([self.items[i] for i in indices])
+
+	def onClose(self, event):
+		self._commit()
+		self.timing.finish()
+		self.Destroy()
+
+class NestedKeysDialog(_CleanupListDialog):
+	"""Lists keys and subsections of registered sections which the config spec does not know.
+	Removals are queued in the Clean NVDA.ini Sections dialog's transaction and
+	written with its other deletions when it closes.
+	"""
+
+	queued_message = _("Queued for removal. Changes are saved when the Clean NVDA.ini Sections dialog closes.")
+
+	def __init__(self, parent, transaction: ProfileSectionTransaction):
+		self.transaction = transaction
+		super().__init__(parent, _("Clean Nested Keys"), "Clean nested keys dialog")
+		self._scan()
+		self.Raise()
+
+	def _scan(self):
+		try:
+			with self.timing.stage("spec diff") as stage:
+				self.items = [
+					item for item in find_unknown_keys(config.conf.profiles[0], config.conf.spec)
+					if not self.transaction.is_pending(item.path, item.key)
+				]
+				stage.count = len(self.items)
+			total = sum(item.size for item in self.items)
+			self.info_text.SetLabel(_(
+				"{count} keys unknown to NVDA and installed add-ons, {size} in total. "
+				"Removals are saved when the Clean NVDA.ini Sections dialog closes."
+			).format(count=len(self.items), size=format_size(total)))
+			self._populate()
+		except Exception as e:
+			log.error(f"Error comparing configuration with its spec: {e}")
+
+	def _get_label(self, item: ConfigKey) -> str:
+		name = " > ".join(item.path + (item.key,))
+		if item.is_section:
+			return _("{name} | {size} | section with {keys} keys").format(
+				name=name, size=format_size(item.size), keys=item.keys
+			)
+		return _("{name} | {size}").format(name=name, size=format_size(item.size))
+
+	def _confirm_message(self, selected: List[ConfigKey]) -> str:
+		return _("Delete {count} keys, {size}?").format(
+			count=len(selected), size=format_size(sum(item.size for item in selected))
+		)
+
+	def _preview(self, selected: List[ConfigKey]) -> DiffPreview:
+		return self.transaction.preview(keys=[(item.path, item.key) for item in selected])
+
+	def _queue(self, selected: List[ConfigKey]):
+		for item in selected:
+			self.transaction.queue_key_removal(item.path, item.key)
+
+class ValidationDialog(_CleanupListDialog):
+	"""Checks every value of the base profile against the effective config spec in one pass.
+	Lists invalid values, unknown keys and values equal to their default; Compact
+	removes all of the latter. Removals are queued in the Clean NVDA.ini Sections
+	dialog's transaction and written when it closes.
+	"""
+
+	queued_message = NestedKeysDialog.queued_message
+
+	def __init__(self, parent, transaction: ProfileSectionTransaction):
+		self.transaction = transaction
+		super().__init__(parent, _("Validate Configuration"), "Validate configuration dialog")
+		self._scan()
+		self.Raise()
+
+	def _add_buttons(self, btn_sizer: wx.BoxSizer):
+		self.compactBtn = wx.Button(self, label=_("&Compact"))
+		self.compactBtn.Bind(wx.EVT_BUTTON, self.onCompact)
+		btn_sizer.Add(self.compactBtn, 0, wx.RIGHT, 10)
+
+	def _scan(self):
+		try:
+			with self.timing.stage("spec index"):
+				index = ConfigSpecIndex(config.conf.spec, self._get_validator())
+			with self.timing.stage("validation") as stage:
+				self.items = [
+					item for item in validate_profile(config.conf.profiles[0], index)
+					if not self.transaction.is_pending(item.path, item.key)
+				]
+				stage.count = len(self.items)
+			counts = {kind: 0 for kind in _FINDING_LABELS}
+			for item in self.items:
+				counts[item.kind] += 1
+			self.info_text.SetLabel(_(
+				"{invalid} invalid values, {unknown} unknown keys and {defaults} values equal to their default. "
+				"Removals are saved when the Clean NVDA.ini Sections dialog closes."
+			).format(
+				invalid=counts[FINDING_INVALID],
+				unknown=counts[FINDING_UNKNOWN],
+				defaults=counts[FINDING_DEFAULT],
+			))
+			self.compactBtn.Enable(counts[FINDING_DEFAULT] > 0)
+			self._populate()
+		except Exception as e:
+			log.error(f"Error validating configuration: {e}")
+
+	def _get_validator(self):
+		# NVDA's own validator knows the check types it registers, such as feature flags
+		validator = getattr(config.conf, 'validator', None) or getattr(config, 'validator', None)
+		if validator is None:
+			try:
+				from configobj.validate import Validator
+			except ImportError:
+				from validate import Validator
+			validator = Validator()
+		return validator
+
+	def _get_label(self, item: ConfigFinding) -> str:
+		return _("{name} = {value} | {size} | {kind}").format(
+			name=" > ".join(item.path + (item.key,)),
+			value=item.value,
+			size=format_size(item.size),
+			kind=_FINDING_LABELS.get(item.kind, item.kind),
+		)
+
+	def _confirm_message(self, selected: List[ConfigFinding]) -> str:
+		return _("Delete {count} values, {size}?").format(
+			count=len(selected), size=format_size(sum(item.size for item in selected))
+		)
+
+	def _preview(self, selected: List[ConfigFinding]) -> DiffPreview:
+		return self.transaction.preview(keys=[(item.path, item.key) for item in selected])
+
+	def _queue(self, selected: List[ConfigFinding]):
+		for item in selected:
+			self.transaction.queue_key_removal(item.path, item.key)
+
+	def onCompact(self, event):
+		"""Remove every value equal to its default."""
+		defaults = [item for item in self.items if item.kind == FINDING_DEFAULT]
+		if not defaults:
+			ui.message(_("No default values to remove."))
+			return
+		self._remove(defaults)
+		self.compactBtn.Enable(any(item.kind == FINDING_DEFAULT for item in self.items))
+
+class ProfileCleanupDialog(_CleanupListDialog):
+	"""Lists orphaned sections of the profiles under profiles/ and removes them in one batch."""
+
+	def __init__(self, parent):
+		# Deletions are queued here and written in one go when the dialog closes
+		self.transaction = ProfileFilesTransaction(get_loaded_profiles())
+		super().__init__(parent, _("Clean Configuration Profiles"), "Clean profiles dialog")
+		self._scan()
+		self.Raise()
+
+	def _scan(self):
+		try:
+			paths = list_profile_files()
+			known_sections = set(config.conf.spec.keys())
+			installed_names = get_installed_addon_index().names
+			with self.timing.stage("profile scan", len(paths)):
+				self.items = scan_profiles(paths, known_sections, installed_names)
+			self.info_text.SetLabel(_(
+				"{count} orphaned sections found in {profiles} profiles. "
+				"Check sections to remove them from every profile carrying them."
+			).format(count=len(self.items), profiles=len(paths)))
+			self._populate()
+		except Exception as e:
+			log.error(f"Error scanning configuration profiles: {e}")
+
+	def _get_label(self, orphan: ProfileOrphan) -> str:
+		return _("{name} | {size} | profiles: {profiles}").format(
+			name=orphan.name, size=format_size(orphan.size), profiles=", ".join(orphan.profiles)
+		)
+
+	def _confirm_message(self, selected: List[ProfileOrphan]) -> str:
+		files = {path for orphan in selected for path in orphan.paths}
+		return _("Delete {count} sections from {files} profiles?").format(count=len(selected), files=len(files))
+
+	def _preview(self, selected: List[ProfileOrphan]) -> DiffPreview:
+		removals: Dict[str, Set[str]] = {}
+		for orphan in selected:
+			for path in orphan.paths:
+				removals.setdefault(path, set()).add(orphan.name)
+		return self.transaction.preview(removals)
+
+	def _queue(self, selected: List[ProfileOrphan]):
+		for orphan in selected:
+			for path in orphan.paths:
+				self.transaction.queue_removal(path, orphan.name)
+
+	def _commit(self):
+		"""Write queued deletions to every affected profile."""
+		with self.timing.stage("ini write", self.transaction.pending_count):
+			if not self.transaction.commit():
+				ui.message(_("Failed to save configuration."))
@@ -2,24 +2,29 @@
 # Copyright (C) 2026 Chai Chaimee
 # Licensed under GNU General Public License. See COPYING.txt for details.
 
+import time
 import addonHandler
 import globalPluginHandler
 import gui
+import importlib
 import wx
-import time
 import ui
 import core
+import config
 from scriptHandler import script
 from logHandler import log
+# The dialog modules pull in wx dialogs and the analysis code, so they are
+# only imported when one of them is first opened (see _load_submodule).
+from . import instrumentation
+
+# Cost of the module level setup below; sub-module imports are timed in _load_submodule
+_setup_started = time.perf_counter_ns()
 
 addonHandler.initTranslation()
 
-# Safe imports for sub-modules
-try:
-	from . import CleanConfig, CheckDuplicateGestures, mygesturesManagement
-except ImportError as e:
-	log.error(f"GestureDuplicate sub-modules missing: {e}")
-	CleanConfig = CheckDuplicateGestures = mygesturesManagement = None
+config.conf.spec[instrumentation.CONFIG_SECTION] = instrumentation.confspec
+
+_setup_ns = time.perf_counter_ns() - _setup_started
 
 class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	scriptCategory = "Gesture Duplicate"
@@ -32,8 +37,43 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	_tools_menu_items = []
 
 	def __init__(self, *args, **kwargs):
+		started = time.perf_counter_ns()
 		super().__init__(*args, **kwargs)
+		# Sub-modules imported so far, by name
+		self._submodules = {}
 		self._add_tools_menu()
+		init_ns = time.perf_counter_ns() - started
+		log.debug(f"Gesture Duplicate startup: module setup {_setup_ns / 1e6:.1f} ms, init {init_ns / 1e6:.1f} ms")
+		timing = instrumentation.start_run("Startup")
+		timing.add("module setup", _setup_ns)
+		timing.add("init", init_ns)
+		timing.finish()
+
+	def _load_submodule(self, name):
+		"""Import one of the dialog modules on first use. Returns None if it cannot be imported."""
+		module = self._submodules.get(name)
+		if module is not None:
+			return module
+		started = time.perf_counter_ns()
+		try:
+			module = importlib.import_module(f".{name}", __package__)
+		except ImportError as e:
+			log.error(f"GestureDuplicate sub-module {name} missing: {e}")
+			return None
+		import_ns = time.perf_counter_ns() - started
+		if name == "CheckDuplicateGestures":
+			# Nothing is cached before the first scan, so changes only need tracking from now on
+			module.register_change_handlers()
+		elif name == "iniTransaction":
+			# Removals queued in an open dialog must reach disk even if NVDA saves or exits first
+			module.register_save_handler()
+		elif name in ("CleanConfig", "mygesturesManagement"):
+			self._load_submodule("iniTransaction")
+		self._submodules[name] = module
+		timing = instrumentation.start_run(f"Load {name}")
+		timing.add("import", import_ns)
+		timing.finish()
+		return module
 
 	def _add_tools_menu(self):
 		"""Add a 'Gesture Duplicate' submenu to NVDA's Tools menu."""
@@ -52,6 +92,12 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			self.gesture_menu.Bind(wx.EVT_MENU, self.onManageGestures, item_manage)
 			item_clean = self.gesture_menu.Append(wx.ID_ANY, _("Clean Configuration..."))
 			self.gesture_menu.Bind(wx.EVT_MENU, self.onCleanConfig, item_clean)
+			self.gesture_menu.AppendSeparator()
+			item_log_timings = self.gesture_menu.AppendCheckItem(wx.ID_ANY, _("&Log Timings"))
+			item_log_timings.Check(instrumentation.is_enabled())
+			self.gesture_menu.Bind(wx.EVT_MENU, self.onToggleLogTimings, item_log_timings)
+			item_timings = self.gesture_menu.Append(wx.ID_ANY, _("Show &Timing Summary..."))
+			self.gesture_menu.Bind(wx.EVT_MENU, self.onShowTimings, item_timings)
 
 			# Insert submenu into Tools menu
 			pos = tools_menu.GetMenuItemCount()
@@ -64,25 +110,40 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
 	def onCheckDuplicates(self, evt):
 		"""Show duplicate gestures dialog."""
+		CheckDuplicateGestures = self._load_submodule("CheckDuplicateGestures")
 		if CheckDuplicateGestures:
 			ui.message(_("Checking duplicate gestures..."))
-			wx.CallAfter(lambda: CheckDuplicateGestures.DuplicateGesturesDialog(
-				gui.mainFrame,
-				CheckDuplicateGestures.find_duplicate_gestures_data()
-			).Show())
+			wx.CallAfter(self._show_duplicates_dialog, CheckDuplicateGestures)
+
+	def _show_duplicates_dialog(self, CheckDuplicateGestures):
+		dialog = CheckDuplicateGestures.DuplicateGesturesDialog(gui.mainFrame)
+		dialog.Show()
+		dialog.start_scan()
 
 	def onManageGestures(self, evt):
 		"""Show gesture management dialog."""
+		mygesturesManagement = self._load_submodule("mygesturesManagement")
 		if mygesturesManagement:
 			ui.message(_("Opening gestures management..."))
 			wx.CallAfter(lambda: mygesturesManagement.MyGesturesManagementDialog(gui.mainFrame).Show())
 
 	def onCleanConfig(self, evt):
 		"""Show clean config dialog."""
+		CleanConfig = self._load_submodule("CleanConfig")
 		if CleanConfig:
 			ui.message(_("Opening clean configuration..."))
 			wx.CallAfter(lambda: CleanConfig.CleanConfigDialog(gui.mainFrame).Show())
 
+	def onToggleLogTimings(self, evt):
+		"""Turn logging of per-stage timings on or off."""
+		enabled = evt.IsChecked()
+		instrumentation.set_enabled(enabled)
+		ui.message(_("Timing logging on") if enabled else _("Timing logging off"))
+
+	def onShowTimings(self, evt):
+		"""Show the timings of the most recent dialog sessions."""
+		ui.browseableMessage(instrumentation.get_summary(), _("Gesture Duplicate Timings"))
+
 	@script(
 		description=_("Multi-tap: 1=Check, 2=Manage, 3=Clean"),
 		category="Gesture Duplicate",
@@ -154,4 +215,13 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			except:
 				pass
 		self._tools_menu_items.clear()
+		CheckDuplicateGestures = self._submodules.get("CheckDuplicateGestures")
+		if CheckDuplicateGestures:
+			CheckDuplicateGestures.unregister_change_handlers()
+			CheckDuplicateGestures.shutdown_executor()
+		iniTransaction = self._submodules.get("iniTransaction")
+		if iniTransaction:
+			# Dialogs still open are torn down without EVT_CLOSE, so write what they queued now
+			iniTransaction.unregister_save_handler()
+			iniTransaction.flush_pending()
 		super().terminate()
\ No newline at end of file
@@ -0,0 +1,99 @@
+# addonIndex.py
+
+import os
+import globalVars
+import addonHandler
+from logHandler import log
+from typing import Any, Collection, Dict, Optional, Tuple
+
+# Sub-packages of an add-on whose module names appear in gestures.ini sections
+_PACKAGE_DIRS = ("globalPlugins", "appModules")
+
+# Files in which NVDA records pending installs and removals
+_STATE_FILES = ("addonsState.pickle", "addonsState.json")
+
+def get_config_dir() -> str:
+	"""Return NVDA's user configuration directory."""
+	config_dir = getattr(globalVars.appArgs, 'configPath', None)
+	if not config_dir:
+		config_dir = os.path.join(os.environ.get('APPDATA', ''), 'nvda')
+	return config_dir
+
+def _mtime(path: str) -> int:
+	try:
+		return os.stat(path).st_mtime_ns
+	except OSError:
+		return 0
+
+def addons_signature() -> Tuple:
+	"""Cheap fingerprint of the installed add-on set.
+	Installing or uninstalling an add-on changes the add-ons directory listing
+	or the add-ons state file, so either event yields a new signature.
+	"""
+	config_dir = get_config_dir()
+	addons_dir = os.path.join(config_dir, "addons")
+	try:
+		listing = tuple(sorted(os.listdir(addons_dir)))
+	except OSError:
+		listing = ()
+	state = tuple(_mtime(os.path.join(config_dir, name)) for name in _STATE_FILES)
+	return (_mtime(addons_dir), listing, state)
+
+def _package_names(addon_path: str):
+	"""Yield the module names an add-on provides as global plugins or app modules."""
+	for sub_dir in _PACKAGE_DIRS:
+		try:
+			names = os.listdir(os.path.join(addon_path, sub_dir))
+		except OSError:
+			continue
+		for name in names:
+			if name.startswith("__"):
+				continue
+			yield os.path.splitext(name)[0]
+
+class InstalledAddonIndex:
+	"""One-shot lookup table of installed add-ons.
+
+	Maps the lowercased add-on name, manifest name, manifest summary and the
+	names of the global plugins and app modules it ships to the add-on, so
+	install status can be answered without touching any manifest again.
+	"""
+
+	__slots__ = ("_by_key", "signature")
+
+	def __init__(self, addons, signature: Tuple = ()):
+		by_key: Dict[str, Any] = {}
+		for addon in addons:
+			if getattr(addon, 'isPendingRemove', False):
+				continue
+			try:
+				keys = [addon.name, addon.manifest.get('name'), addon.manifest.get('summary')]
+				keys.extend(_package_names(addon.path))
+			except Exception as e:
+				log.debug(f"Skipping add-on while indexing: {e}")
+				continue
+			for key in keys:
+				if key:
+					by_key.setdefault(str(key).lower(), addon)
+		self._by_key = by_key
+		self.signature = signature
+
+	@property
+	def names(self) -> Collection[str]:
+		"""Every lowercased name an installed add-on is known by."""
+		return self._by_key.keys()
+
+_index: Optional[InstalledAddonIndex] = None
+
+def get_installed_addon_index() -> InstalledAddonIndex:
+	"""Return the shared index, rebuilding it after add-ons were installed or removed."""
+	global _index
+	signature = addons_signature()
+	if _index is None or _index.signature != signature:
+		try:
+			addons = list(addonHandler.getAvailableAddons())
+		except Exception as e:
+			log.error(f"Error listing add-ons: {e}")
+			addons = []
+		_index = InstalledAddonIndex(addons, signature)
+	return _index
@@ -0,0 +1,381 @@
+# analysis.py
+# Headless core of the gesture and configuration analysis.
+# Takes plain data (script info entries, gestures.ini and nvda.ini contents) and has
+# no dependency on NVDA or wx, so it can be profiled and tested anywhere.
+
+import re
+from sys import intern
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, KeysView, List, Mapping, Optional, Tuple
+from .conflictIndex import ConflictIndex, ScriptSnapshot
+from .gesturesIni import Patch, iter_gesture_entries
+from .records import ConfigKey, ConfigSection, GestureBinding, IniGesture
+
+# Used when the caller does not provide the keyboard layouts of the running NVDA
+DEFAULT_LAYOUTS = ("desktop", "laptop")
+# globalPlugins.<name> sections which do not belong to an add-on
+_NON_ADDON_PLUGINS = ('main', 'run')
+
+# Status of an nvda.ini section: registered in the config spec, named after an
+# installed add-on which registered no spec, or neither
+SECTION_REGISTERED = "registered"
+SECTION_ADDON = "addon"
+SECTION_ORPHANED = "orphaned"
+
+_BOM = b"\xef\xbb\xbf"
+# Config spec entries standing for any number of subsections, or of values
+_SPEC_MANY = "__many__"
+_SPEC_MANY_VALUES = "___many___"
+
+class GestureNormalizer:
+	"""Normalizes gesture identifiers for comparison. Build one per scan.
+
+	Strips every known layout qualifier with a single precompiled pattern and
+	sorts the keys of a combination, so that "kb(laptop):shift+control+x" and
+	"kb(desktop):control+shift+x" compare equal.
+	"""
+
+	def __init__(self, layouts: Iterable[str] = DEFAULT_LAYOUTS):
+		layouts = sorted(set(layouts), key=len, reverse=True)
+		# Equal for normalizers built from the same layouts, which give the same results
+		self.key = tuple(layouts)
+		alternatives = "|".join(re.escape(layout) for layout in layouts)
+		self._layout_re = re.compile(rf"\((?:{alternatives})\)", re.IGNORECASE) if alternatives else None
+		self._cache: Dict[str, str] = {}
+
+	def __call__(self, gesture: str) -> str:
+		norm = self._cache.get(gesture)
+		if norm is None:
+			norm = self._cache[gesture] = self._normalize(gesture)
+		return norm
+
+	def _normalize(self, gesture: str) -> str:
+		norm = gesture.lower()
+		if self._layout_re is not None:
+			norm = self._layout_re.sub("", norm)
+		source, sep, keys = norm.partition(":")
+		if sep and "+" in keys:
+			norm = f"{source}:{'+'.join(sorted(keys.split('+')))}"
+		return norm
+
+# --- Duplicate gestures
+
+def script_section(class_name: str, module_name: Optional[str]) -> str:
+	"""Return the "module.Class" section a script is bound in, as used by gestures.ini."""
+	if module_name and not class_name.startswith(module_name + "."):
+		return f"{module_name}.{class_name}"
+	return class_name
+
+def snapshot_from_entries(entries: Iterable[Tuple[str, str, Any]]) -> List[ScriptSnapshot]:
+	"""Copy (category, script name, script info) entries into plain scan tuples.
+	Script infos are read through their className, moduleName, displayName and
+	gestures attributes; scripts without gestures are left out.
+	"""
+	snapshot = []
+	for category, script_name, info in entries:
+		gestures = getattr(info, 'gestures', None)
+		if not gestures:
+			continue
+		snapshot.append((
+			category,
+			script_name,
+			script_section(getattr(info, 'className', "Unknown"), getattr(info, 'moduleName', None)),
+			getattr(info, 'displayName', script_name),
+			tuple(gestures),
+		))
+	return snapshot
+
+def find_duplicates(snapshot: List[ScriptSnapshot], normalize: Optional[Callable[[str], str]] = None,
+		cancel_event=None, progress: Optional[Callable[[int, int], None]] = None) -> Optional[List[GestureBinding]]:
+	"""Return the records of every gesture bound more than once, ordered by gesture.
+	Returns None if cancel_event was set during the scan.
+	"""
+	if normalize is None:
+		normalize = GestureNormalizer()
+	index = ConflictIndex()
+	if not index.update(snapshot, normalize, cancel_event=cancel_event, progress=progress):
+		return None
+	return index.duplicates()
+
+def mappings_fingerprint(
+		gestures_ini: Tuple,
+		addons: Tuple,
+		plugins: Iterable[str],
+		focus: Tuple,
+		braille_display: str,
+		vision_providers: Iterable[str]
+) -> Tuple:
+	"""Combine everything the gesture mappings depend on into one comparable value.
+	The running global plugins and vision providers are compared as sets.
+	"""
+	return (
+		gestures_ini, addons, tuple(sorted(plugins)), focus,
+		braille_display, tuple(sorted(vision_providers)),
+	)
+
+# --- gestures.ini
+
+def get_addon_name(section: str) -> str:
+	"""Return the add-on owning a gestures.ini section, or an empty string for core sections."""
+	parts = section.split('.')
+	if len(parts) < 2:
+		return ""
+	if parts[0] == "globalPlugins":
+		if parts[1].lower() not in _NON_ADDON_PLUGINS:
+			return parts[1]
+	elif parts[0] == "appModules":
+		return parts[1]
+	return ""
+
+def is_addon_installed(addon_name: str, section: str, installed_names: Collection[str]) -> bool:
+	"""installed_names holds lowercased add-on, manifest and package names."""
+	if addon_name and addon_name.lower() in installed_names:
+		return True
+	# App modules may be provided by NVDA itself, so never report them as orphaned
+	return section.startswith("appModules.")
+
+def load_addon_gestures(
+		data: bytes,
+		installed_names: Collection[str],
+		display_name: Optional[Callable[[str, str], str]] = None
+) -> List[IniGesture]:
+	"""Return a record for every add-on gesture in gestures.ini.
+	display_name(script, section) resolves the user visible script name.
+	"""
+	gestures = []
+	# section -> (interned section, add-on name, installed), resolved once per section
+	sections: Dict[str, Tuple[str, str, bool]] = {}
+	for entry in iter_gesture_entries(data):
+		known = sections.get(entry.section)
+		if known is None:
+			section = intern(entry.section)
+			addon_name = intern(get_addon_name(section))
+			known = sections[section] = (
+				section, addon_name, is_addon_installed(addon_name, section, installed_names)
+			)
+		section, addon_name, installed = known
+		if not addon_name:
+			continue
+		for script_name in entry.scripts:
+			if script_name == "None":
+				continue
+			gestures.append(IniGesture(
+				section,
+				entry.gesture,
+				script_name,
+				display_name(script_name, section) if display_name else script_name,
+				addon_name,
+				installed
+			))
+	return gestures
+
+class AddonGestureIndex:
+	"""Add-on gestures grouped as add-on -> section -> records, built once per load.
+
+	Listing, counting or dropping the gestures of one add-on only touches that
+	add-on's group. Records keep their gestures.ini order within a section.
+	"""
+
+	def __init__(self, gestures: Iterable[IniGesture] = ()):
+		self._groups: Dict[str, Dict[str, List[IniGesture]]] = {}
+		self._counts: Dict[str, int] = {}
+		self._total = 0
+		for g in gestures:
+			self._groups.setdefault(g.addon_name, {}).setdefault(g.section, []).append(g)
+			self._counts[g.addon_name] = self._counts.get(g.addon_name, 0) + 1
+			self._total += 1
+
+	def __len__(self) -> int:
+		return self._total
+
+	def __contains__(self, addon_name: str) -> bool:
+		return addon_name in self._groups
+
+	@property
+	def addons(self) -> KeysView[str]:
+		return self._groups.keys()
+
+	def count(self, addon_name: str) -> int:
+		return self._counts.get(addon_name, 0)
+
+	def gestures(self, addon_name: Optional[str] = None) -> List[IniGesture]:
+		"""Return the records of one add-on, or of every add-on if addon_name is None."""
+		if addon_name is None:
+			groups = self._groups.values()
+		else:
+			group = self._groups.get(addon_name)
+			groups = (group,) if group is not None else ()
+		return [g for group in groups for records in group.values() for g in records]
+
+	def remove_addon(self, addon_name: str) -> List[IniGesture]:
+		"""Drop and return the records of an add-on."""
+		group = self._groups.pop(addon_name, None)
+		if group is None:
+			return []
+		self._total -= self._counts.pop(addon_name)
+		return [g for records in group.values() for g in records]
+
+	def discard(self, removed: Iterable[IniGesture]):
+		"""Drop the given records, touching only the sections they belong to."""
+		by_section: Dict[Tuple[str, str], set] = {}
+		for g in removed:
+			by_section.setdefault((g.addon_name, g.section), set()).add(id(g))
+		for (addon_name, section), ids in by_section.items():
+			group = self._groups.get(addon_name)
+			records = group.get(section) if group is not None else None
+			if records is None:
+				continue
+			kept = [g for g in records if id(g) not in ids]
+			dropped = len(records) - len(kept)
+			self._counts[addon_name] -= dropped
+			self._total -= dropped
+			if kept:
+				group[section] = kept
+			else:
+				del group[section]
+				if not group:
+					del self._groups[addon_name]
+					del self._counts[addon_name]
+
+# --- nvda.ini
+
+def _section_status(name: str, known_sections: Collection[str], installed_names: Collection[str]) -> str:
+	if name in known_sections:
+		return SECTION_REGISTERED
+	if name.lower() in installed_names:
+		return SECTION_ADDON
+	return SECTION_ORPHANED
+
+def measure_config_sections(
+		data: bytes,
+		known_sections: Collection[str],
+		installed_names: Collection[str]
+) -> List[ConfigSection]:
+	"""Measure every top-level section of a serialized ini file in one pass.
+	Returns orphaned sections first, then the largest first.
+	"""
+	sections: List[ConfigSection] = []
+	current: Optional[ConfigSection] = None
+	for raw_line in data.splitlines(keepends=True):
+		line = raw_line.strip().removeprefix(_BOM)
+		if line.startswith(b"["):
+			depth = len(line) - len(line.lstrip(b"["))
+			if depth == 1:
+				name = line.strip(b"[]").strip().decode("utf-8", errors="replace")
+				current = ConfigSection(name, 0, 0, 1, _section_status(name, known_sections, installed_names))
+				sections.append(current)
+			elif current is not None and depth > current.depth:
+				current.depth = depth
+		elif current is not None and line and not line.startswith((b"#", b";")) and b"=" in line:
+			current.keys += 1
+		if current is not None:
+			current.size += len(raw_line)
+	sections.sort(key=lambda section: (section.status != SECTION_ORPHANED, -section.size, section.name.lower()))
+	return sections
+
+def iter_config_section_ranges(data: bytes) -> Iterator[Tuple[str, int, int]]:
+	"""Yield (name, start, end) byte ranges of the top-level sections of a serialized ini file.
+	A range runs from the section header up to the next top-level header.
+	"""
+	name = None
+	start = pos = 0
+	for raw_line in data.splitlines(keepends=True):
+		line = raw_line.strip().removeprefix(_BOM)
+		if line.startswith(b"[") and not line.startswith(b"[["):
+			if name is not None:
+				yield name, start, pos
+			name = line.strip(b"[]").strip().decode("utf-8", errors="replace")
+			start = pos
+			if pos == 0 and raw_line.startswith(_BOM):
+				# The byte order mark stays with the file
+				start = len(_BOM)
+		pos += len(raw_line)
+	if name is not None:
+		yield name, start, pos
+
+def build_section_removal_patches(data: bytes, names: Collection[str]) -> List[Patch]:
+	"""Return the patches deleting the named top-level sections, subsections included."""
+	return [(start, end, b"") for name, start, end in iter_config_section_ranges(data) if name in names]
+
+def _unquote_key(text: bytes) -> str:
+	text = text.strip()
+	if len(text) >= 2 and text[:1] == text[-1:] and text[:1] in (b'"', b"'"):
+		text = text[1:-1]
+	return text.decode("utf-8", errors="replace")
+
+def build_key_removal_patches(data: bytes, keys: Collection[Tuple[Tuple[str, ...], str]]) -> List[Patch]:
+	"""Return the patches deleting keys and sections, each given as (path of sections, key).
+	A section runs from its header up to the next header at the same or a lower depth.
+	"""
+	patches: List[Patch] = []
+	path: List[str] = []
+	# Depth and start of the section being deleted
+	removing: Optional[Tuple[int, int]] = None
+	pos = 0
+	for raw_line in data.splitlines(keepends=True):
+		start = pos
+		pos += len(raw_line)
+		if start == 0 and raw_line.startswith(_BOM):
+			start = len(_BOM)
+			raw_line = raw_line[len(_BOM):]
+		line = raw_line.strip()
+		if not line or line.startswith(b"#"):
+			continue
+		if line.startswith(b"["):
+			depth = len(line) - len(line.lstrip(b"["))
+			name = _unquote_key(line.strip(b"[]"))
+			if removing is not None:
+				if depth > removing[0]:
+					continue
+				patches.append((removing[1], start, b""))
+				removing = None
+			del path[depth - 1:]
+			if (tuple(path), name) in keys:
+				removing = (depth, start)
+			path.append(name)
+		elif removing is None and b"=" in line:
+			if (tuple(path), _unquote_key(line.split(b"=", 1)[0])) in keys:
+				patches.append((start, pos, b""))
+	if removing is not None:
+		patches.append((removing[1], pos, b""))
+	return patches
+
+def serialized_size(key: str, value, depth: int) -> int:
+	"""Estimate the bytes a key takes in a tab indented ini file, at depth sections deep."""
+	if isinstance(value, Mapping):
+		size = depth + 2 * (depth + 1) + len(key.encode("utf-8")) + 1
+		return size + sum(serialized_size(str(k), v, depth + 1) for k, v in value.items())
+	if isinstance(value, (list, tuple)):
+		value = ", ".join(str(item) for item in value)
+	return depth + len(f"{key} = {value}\n".encode("utf-8"))
+
+def _count_keys(value) -> int:
+	if isinstance(value, Mapping):
+		return sum(_count_keys(child) for child in value.values())
+	return 1
+
+def _diff_against_spec(section: Mapping, spec: Mapping, path: Tuple[str, ...], unknown: List[ConfigKey]):
+	many = spec.get(_SPEC_MANY)
+	any_values = _SPEC_MANY_VALUES in spec or (many is not None and not isinstance(many, Mapping))
+	for key, value in section.items():
+		key = str(key)
+		child_spec = spec.get(key)
+		if isinstance(value, Mapping):
+			if child_spec is None and isinstance(many, Mapping):
+				# Such as the settings of a speech synthesizer, braille display or vision provider:
+				# only the driver in use adds its own keys to the spec, so none of them can be told unknown
+				continue
+			if isinstance(child_spec, Mapping):
+				_diff_against_spec(value, child_spec, path + (key,), unknown)
+			elif path:
+				unknown.append(ConfigKey(path, key, serialized_size(key, value, len(path)), _count_keys(value), True))
+		elif child_spec is None and not any_values:
+			unknown.append(ConfigKey(path, key, serialized_size(key, value, len(path)), 1, False))
+
+def find_unknown_keys(profile: Mapping, spec: Mapping) -> List[ConfigKey]:
+	"""Diff a loaded profile against its config spec and return the keys the spec does not know, largest first.
+	Top-level sections missing from the spec are left out: they are whole add-on or orphaned sections.
+	"""
+	unknown: List[ConfigKey] = []
+	_diff_against_spec(profile, spec, (), unknown)
+	unknown.sort(key=lambda item: (-item.size, item.path, item.key))
+	return unknown
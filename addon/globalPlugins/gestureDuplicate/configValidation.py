@@ -0,0 +1,141 @@
+# configValidation.py
+# Checks a configuration profile against the effective config spec in one pass.
+# Needs configobj's validator, but nothing else from NVDA.
+
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+try:
+	from configobj.validate import ValidateError, VdtUnknownCheckError
+except ImportError:
+	# configobj releases before 5.1 ship validate as a top-level module
+	from validate import ValidateError, VdtUnknownCheckError
+from .analysis import serialized_size
+from .records import ConfigFinding
+
+# The value equals the default of its spec, so removing it changes nothing
+FINDING_DEFAULT = "default"
+# The value does not pass its spec check; NVDA falls back to the default
+FINDING_INVALID = "invalid"
+# No spec covers the key
+FINDING_UNKNOWN = "unknown"
+
+# Values kept even when equal to their default: NVDA's profile upgrader reads a
+# missing schema version as version 0 and would upgrade the profile again
+_KEEP_DEFAULTS = frozenset((((), "schemaVersion"),))
+
+_SPEC_MANY = "__many__"
+_SPEC_MANY_VALUES = "___many___"
+_NO_DEFAULT = object()
+
+class ConfigSpecIndex:
+	"""Lookup table of the effective config spec.
+
+	config.conf.spec holds the core sections and the confspec registered by
+	every running add-on. Section specs are resolved once per path, __many__
+	wildcards included, and the default of a check once per check string.
+	"""
+
+	def __init__(self, spec: Mapping, validator):
+		self.validator = validator
+		self._sections: Dict[Tuple[str, ...], Optional[Mapping]] = {(): spec}
+		# Paths whose spec, or the spec of a section above them, came from a __many__ wildcard
+		self._wildcards: Set[Tuple[str, ...]] = set()
+		self._defaults: Dict[str, Any] = {}
+
+	def section(self, path: Tuple[str, ...]) -> Optional[Mapping]:
+		"""Return the spec of the section at path, or None if the spec does not know it."""
+		try:
+			return self._sections[path]
+		except KeyError:
+			pass
+		result = None
+		parent = self.section(path[:-1])
+		if parent is not None:
+			child = parent.get(path[-1])
+			wildcard = path[:-1] in self._wildcards
+			if child is None:
+				child = parent.get(_SPEC_MANY)
+				wildcard = True
+			if isinstance(child, Mapping):
+				result = child
+				if wildcard:
+					self._wildcards.add(path)
+		self._sections[path] = result
+		return result
+
+	def is_wildcard(self, path: Tuple[str, ...]) -> bool:
+		"""Whether the section at path is only known through a __many__ spec, like inactive driver settings."""
+		return self.section(path) is not None and path in self._wildcards
+
+	def check(self, path: Tuple[str, ...], key: str) -> Optional[str]:
+		"""Return the check string of a value, or None if the spec does not know it."""
+		section = self.section(path)
+		if section is None:
+			return None
+		check = section.get(key)
+		if check is None:
+			check = section.get(_SPEC_MANY_VALUES)
+		if check is None:
+			check = section.get(_SPEC_MANY)
+		return check if isinstance(check, str) else None
+
+	def default(self, check: str) -> Any:
+		"""Return the converted default of a check, or _NO_DEFAULT if it has none."""
+		try:
+			return self._defaults[check]
+		except KeyError:
+			pass
+		try:
+			default = self.validator.get_default_value(check)
+		except (KeyError, ValidateError):
+			default = _NO_DEFAULT
+		self._defaults[check] = default
+		return default
+
+def _format_value(value: Any) -> str:
+	if isinstance(value, (list, tuple)):
+		return ", ".join(str(item) for item in value)
+	return str(value)
+
+def _validate_section(
+		section: Mapping,
+		path: Tuple[str, ...],
+		index: ConfigSpecIndex,
+		findings: List[ConfigFinding]
+):
+	for key, value in section.items():
+		key = str(key)
+		if isinstance(value, Mapping):
+			child_path = path + (key,)
+			# Unknown sections are reported as a whole by the section and nested key lists
+			if index.section(child_path) is not None:
+				_validate_section(value, child_path, index, findings)
+			continue
+		size = serialized_size(key, value, len(path))
+		check = index.check(path, key)
+		if check is None:
+			if index.section(path) is not None and not index.is_wildcard(path):
+				findings.append(ConfigFinding(path, key, _format_value(value), FINDING_UNKNOWN, size))
+			continue
+		try:
+			converted = index.validator.check(check, value)
+		except VdtUnknownCheckError:
+			# A check type registered elsewhere, which this validator cannot run
+			continue
+		except ValidateError:
+			findings.append(ConfigFinding(path, key, _format_value(value), FINDING_INVALID, size))
+			continue
+		if (path, key) in _KEEP_DEFAULTS:
+			continue
+		default = index.default(check)
+		if default is not _NO_DEFAULT and converted == default:
+			findings.append(ConfigFinding(path, key, _format_value(value), FINDING_DEFAULT, size))
+
+def validate_profile(profile: Mapping, index: ConfigSpecIndex) -> List[ConfigFinding]:
+	"""Walk a loaded profile once and return its redundant defaults, invalid values and unknown keys.
+	Invalid values come first, then unknown keys, then redundant defaults; the largest first within each.
+	"""
+	findings: List[ConfigFinding] = []
+	_validate_section(profile, (), index, findings)
+	order = {FINDING_INVALID: 0, FINDING_UNKNOWN: 1, FINDING_DEFAULT: 2}
+	findings.sort(key=lambda finding: (order[finding.kind], -finding.size, finding.path, finding.key))
+	return findings
@@ -0,0 +1,158 @@
+# conflictGraph.py
+# Classifies duplicate gestures by the contexts their bindings live in.
+# Works on plain GestureBinding records and has no NVDA dependencies.
+
+from dataclasses import dataclass
+from itertools import combinations, groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+from .records import GestureBinding
+
+# Binding contexts, in the order NVDA offers a gesture to them
+KIND_GLOBAL_PLUGIN = "globalPlugin"
+KIND_BRAILLE_DISPLAY = "brailleDisplay"
+KIND_VISION_PROVIDER = "visionProvider"
+KIND_APP_MODULE = "appModule"
+KIND_TREE_INTERCEPTOR = "treeInterceptor"
+KIND_NVDA_OBJECT = "nvdaObject"
+KIND_GLOBAL_COMMANDS = "globalCommands"
+# Anything else, e.g. scripts of a class whose module could not be determined
+KIND_OTHER = "other"
+
+PRECEDENCE: Tuple[str, ...] = (
+	KIND_GLOBAL_PLUGIN,
+	KIND_BRAILLE_DISPLAY,
+	KIND_VISION_PROVIDER,
+	KIND_APP_MODULE,
+	KIND_TREE_INTERCEPTOR,
+	KIND_NVDA_OBJECT,
+	KIND_GLOBAL_COMMANDS,
+)
+
+# One binding hides another that is active at the same time
+SEVERITY_SHADOWING = "shadowing"
+# Both bindings are active at the same level; which one runs depends on load order or class layout
+SEVERITY_AMBIGUOUS = "ambiguous"
+# The bindings are never active together, e.g. two different applications
+SEVERITY_BENIGN = "benign"
+
+# Most severe first
+SEVERITIES: Tuple[str, ...] = (SEVERITY_SHADOWING, SEVERITY_AMBIGUOUS, SEVERITY_BENIGN)
+ACTIONABLE_SEVERITIES = frozenset((SEVERITY_SHADOWING, SEVERITY_AMBIGUOUS))
+_RANK = {severity: rank for rank, severity in enumerate(SEVERITIES)}
+
+# Modules whose classes only provide scripts to tree interceptors
+_TREE_INTERCEPTOR_MODULES = ("browseMode", "virtualBuffers", "treeInterceptorHandler", "cursorManager")
+
+@dataclass(slots=True, frozen=True)
+class BindingContext:
+	"""Where a binding lives. scope is the application of app module bindings, the
+	add-on of global plugins and the class section of everything else."""
+	kind: str
+	scope: str
+	# The application the binding is limited to, if any
+	app: str = ""
+
+@dataclass(slots=True, eq=False)
+class ConflictEdge:
+	"""Two bindings of the same gesture. For shadowing, first is the binding which wins."""
+	first: GestureBinding
+	second: GestureBinding
+	severity: str
+
+def binding_context(section: str) -> BindingContext:
+	"""Return the context of a "module.Class" section of a script."""
+	module, _sep, class_name = section.rpartition(".")
+	parts = module.split(".")
+	root = parts[0]
+	if root == "globalPlugins" and len(parts) > 1:
+		if class_name == "GlobalPlugin":
+			return BindingContext(KIND_GLOBAL_PLUGIN, parts[1])
+		# Overlay class defined by a global plugin
+		return BindingContext(KIND_NVDA_OBJECT, section)
+	if root == "appModules" and len(parts) > 1:
+		if class_name == "AppModule":
+			return BindingContext(KIND_APP_MODULE, parts[1], parts[1])
+		return BindingContext(KIND_NVDA_OBJECT, section, parts[1])
+	if root == "brailleDisplayDrivers" and len(parts) > 1:
+		return BindingContext(KIND_BRAILLE_DISPLAY, parts[1])
+	if root == "visionEnhancementProviders" and len(parts) > 1:
+		return BindingContext(KIND_VISION_PROVIDER, parts[1])
+	if root == "globalCommands":
+		return BindingContext(KIND_GLOBAL_COMMANDS, section)
+	if root in _TREE_INTERCEPTOR_MODULES or "TreeInterceptor" in class_name:
+		return BindingContext(KIND_TREE_INTERCEPTOR, section)
+	if root == "NVDAObjects" or root == "editableText":
+		return BindingContext(KIND_NVDA_OBJECT, section)
+	return BindingContext(KIND_OTHER, section)
+
+def classify(first: BindingContext, second: BindingContext) -> str:
+	"""Return the severity of two bindings of the same gesture."""
+	if first.app and second.app and first.app != second.app:
+		return SEVERITY_BENIGN
+	if first.kind == KIND_OTHER or second.kind == KIND_OTHER:
+		return SEVERITY_AMBIGUOUS
+	if first.kind != second.kind:
+		return SEVERITY_SHADOWING
+	if first.kind in (KIND_TREE_INTERCEPTOR, KIND_NVDA_OBJECT) and first.scope != second.scope:
+		# Different classes: either never used for the same object, or a subclass overriding on purpose
+		return SEVERITY_BENIGN
+	if first.kind == KIND_BRAILLE_DISPLAY and first.scope != second.scope:
+		# Only one braille display driver is loaded at a time
+		return SEVERITY_BENIGN
+	return SEVERITY_AMBIGUOUS
+
+def _precedence(context: BindingContext) -> int:
+	try:
+		return PRECEDENCE.index(context.kind)
+	except ValueError:
+		return len(PRECEDENCE)
+
+class ConflictGraph:
+	"""Conflict graph of duplicate gestures.
+
+	Nodes are the bindings of each normalized gesture, edges join every pair of
+	them and carry a severity. A gesture is as severe as its worst edge. Built
+	in one pass over the duplicates grouped by gesture, as returned by
+	ConflictIndex.duplicates().
+	"""
+
+	def __init__(self, duplicates: Iterable[GestureBinding]):
+		self.nodes: Dict[str, List[GestureBinding]] = {}
+		self.edges: Dict[str, List[ConflictEdge]] = {}
+		self.severity: Dict[str, str] = {}
+		self._contexts: Dict[str, BindingContext] = {}
+		for norm, group in groupby(duplicates, key=lambda record: record.norm_gesture):
+			bindings = list(group)
+			edges = []
+			worst = SEVERITY_BENIGN
+			for first, second in combinations(bindings, 2):
+				first_context = self.context_of(first.class_name)
+				second_context = self.context_of(second.class_name)
+				severity = classify(first_context, second_context)
+				if severity == SEVERITY_SHADOWING and _precedence(second_context) < _precedence(first_context):
+					first, second = second, first
+				edges.append(ConflictEdge(first, second, severity))
+				if _RANK[severity] < _RANK[worst]:
+					worst = severity
+			self.nodes[norm] = bindings
+			self.edges[norm] = edges
+			self.severity[norm] = worst
+
+	def context_of(self, section: str) -> BindingContext:
+		context = self._contexts.get(section)
+		if context is None:
+			context = self._contexts[section] = binding_context(section)
+		return context
+
+	def severity_of(self, record: GestureBinding) -> Optional[str]:
+		return self.severity.get(record.norm_gesture)
+
+	def is_actionable(self, record: GestureBinding) -> bool:
+		return self.severity.get(record.norm_gesture) in ACTIONABLE_SEVERITIES
+
+	def counts(self) -> Dict[str, int]:
+		"""Number of conflicting gestures per severity."""
+		counts = dict.fromkeys(SEVERITIES, 0)
+		for severity in self.severity.values():
+			counts[severity] += 1
+		return counts
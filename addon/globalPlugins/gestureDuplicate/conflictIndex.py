@@ -0,0 +1,164 @@
+# conflictIndex.py
+
+import threading
+from sys import intern
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from .records import GestureBinding
+
+# (category, scriptName, "module.Class" section, displayName, gestures) copied from a script info
+ScriptSnapshot = Tuple[str, str, str, str, Tuple[str, ...]]
+# (scriptName, className) identifying one binding of a gesture
+BindingKey = Tuple[str, str]
+# normalized gesture -> binding -> gesture record, for the bindings of one class
+ClassGroup = Dict[Tuple[str, BindingKey], GestureBinding]
+
+# How many scripts are scanned between two cancellation / progress checks
+_SCAN_CHUNK = 500
+
+class ConflictIndex:
+	"""Persistent index of normalized gesture -> bindings.
+
+	Bindings are grouped by the class providing them. On update only the classes
+	whose scripts changed since the previous snapshot are normalized again, and the set
+	of conflicting gestures is maintained alongside, so reading the duplicates
+	costs O(conflicts) rather than a full rescan.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._bindings: Dict[str, Dict[BindingKey, GestureBinding]] = {}
+		self._by_class: Dict[str, ClassGroup] = {}
+		# The snapshot rows each class was last built from, compared to find the classes that changed
+		self._rows: Dict[str, List[ScriptSnapshot]] = {}
+		self._normalizer_key: Hashable = None
+		self._conflicts: set = set()
+		self._dirty = True
+		# Bumped by every mark_dirty, so a scan running meanwhile does not clear it
+		self._generation = 0
+		self.signature: Optional[Hashable] = None
+
+	def mark_dirty(self):
+		"""Force the next update, e.g. after gestures or add-ons changed."""
+		with self._lock:
+			self._generation += 1
+			self._dirty = True
+
+	@property
+	def generation(self) -> int:
+		"""Changes with every mark_dirty; read it before taking the snapshot passed to update."""
+		return self._generation
+
+	def is_fresh(self, signature: Hashable) -> bool:
+		return not self._dirty and self.signature == signature
+
+	def _split(self, snapshot: List[ScriptSnapshot]) -> Dict[str, List[ScriptSnapshot]]:
+		"""Group the snapshot rows by the class providing them, without normalizing anything."""
+		rows: Dict[str, List[ScriptSnapshot]] = {}
+		for row in snapshot:
+			rows.setdefault(row[2], []).append(row)
+		return rows
+
+	def _group(
+			self,
+			rows_by_class: Dict[str, List[ScriptSnapshot]],
+			normalize: Callable[[str], str],
+			cancel_event: Optional[threading.Event],
+			progress: Optional[Callable[[int, int], None]]
+	) -> Optional[Dict[str, ClassGroup]]:
+		"""Normalize the rows of the given classes into gesture records."""
+		groups: Dict[str, ClassGroup] = {}
+		total = sum(len(rows) for rows in rows_by_class.values())
+		position = 0
+		for class_name, rows in rows_by_class.items():
+			class_name = intern(class_name)
+			group = groups[class_name] = {}
+			for category, script_name, _class_name, display_name, gestures in rows:
+				if position % _SCAN_CHUNK == 0:
+					if cancel_event is not None and cancel_event.is_set():
+						return None
+					if progress is not None:
+						progress(position, total)
+				position += 1
+				category = intern(category)
+				for gesture in gestures:
+					try:
+						norm = normalize(gesture)
+					except Exception:
+						continue
+					key = (norm, (script_name, class_name))
+					if key in group:
+						continue
+					group[key] = GestureBinding(gesture, norm, category, display_name, class_name, script_name)
+		return groups
+
+	def _remove(self, group: ClassGroup):
+		for norm, binding in group:
+			bindings = self._bindings.get(norm)
+			if bindings is None:
+				continue
+			bindings.pop(binding, None)
+			if len(bindings) < 2:
+				self._conflicts.discard(norm)
+			if not bindings:
+				del self._bindings[norm]
+
+	def _add(self, group: ClassGroup):
+		for (norm, binding), record in group.items():
+			bindings = self._bindings.setdefault(norm, {})
+			bindings[binding] = record
+			if len(bindings) > 1:
+				self._conflicts.add(norm)
+
+	def update(
+			self,
+			snapshot: List[ScriptSnapshot],
+			normalize: Callable[[str], str],
+			signature: Hashable = None,
+			cancel_event: Optional[threading.Event] = None,
+			progress: Optional[Callable[[int, int], None]] = None,
+			generation: Optional[int] = None
+	) -> bool:
+		"""Bring the index in line with a mappings snapshot.
+		The index stays dirty if mark_dirty was called since generation was read,
+		which defaults to the start of the update.
+		Returns False, leaving the index untouched, if the update was cancelled.
+		"""
+		if generation is None:
+			generation = self._generation
+		rows_by_class = self._split(snapshot)
+		# A normalizer for other layouts changes every record
+		normalizer_key = getattr(normalize, 'key', normalize)
+		if normalizer_key != self._normalizer_key:
+			changed = rows_by_class
+		else:
+			changed = {
+				class_name: rows for class_name, rows in rows_by_class.items()
+				if self._rows.get(class_name) != rows
+			}
+		groups = self._group(changed, normalize, cancel_event, progress)
+		if groups is None:
+			return False
+		with self._lock:
+			for class_name in list(self._by_class):
+				if class_name not in rows_by_class:
+					self._remove(self._by_class.pop(class_name))
+			for class_name, group in groups.items():
+				old = self._by_class.get(class_name)
+				if old is not None:
+					self._remove(old)
+				self._by_class[class_name] = group
+				self._add(group)
+			self._rows = rows_by_class
+			self._normalizer_key = normalizer_key
+			self.signature = signature
+			self._dirty = self._generation != generation
+		return True
+
+	def duplicates(self) -> List[GestureBinding]:
+		"""Return the records of every conflicting gesture, ordered by gesture."""
+		with self._lock:
+			return [
+				record
+				for norm in sorted(self._conflicts)
+				for record in self._bindings[norm].values()
+			]
@@ -0,0 +1,47 @@
+# displayText.py
+# Display text of gesture identifiers, cached across all dialogs.
+
+from functools import lru_cache
+from typing import Tuple
+import config
+import inputCore
+import languageHandler
+from logHandler import log
+
+# Upper bound of cached identifiers; a heavily customized setup has a few thousand
+CACHE_SIZE = 4096
+
+_context: Tuple[str, str] = ("", "")
+
+def get_context() -> Tuple[str, str]:
+	"""Return the (keyboard layout, UI language) display texts and script names depend on."""
+	try:
+		layout = config.conf['keyboard']['keyboardLayout']
+	except Exception:
+		layout = ""
+	try:
+		language = languageHandler.getLanguage()
+	except Exception:
+		language = ""
+	return (layout, language)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _get_display_text(identifier: str, layout: str, language: str) -> str:
+	try:
+		display_text = inputCore.getDisplayTextForGestureIdentifier(identifier)
+		if display_text and len(display_text) >= 2:
+			return display_text[1]
+	except Exception as e:
+		log.debug(f"No display text for {identifier}: {e}")
+	return identifier
+
+def get_gesture_display(identifier: str) -> str:
+	"""Return the user visible text of a gesture identifier.
+	The cache is dropped as soon as the keyboard layout or UI language changes.
+	"""
+	global _context
+	context = get_context()
+	if context != _context:
+		_get_display_text.cache_clear()
+		_context = context
+	return _get_display_text(identifier, *context)
@@ -0,0 +1,163 @@
+# dryRun.py
+# Unified diff previews of byte range patches, computed without writing anything.
+# Has no NVDA dependencies.
+
+from dataclasses import dataclass, field
+from typing import Iterable, List, Tuple
+from .gesturesIni import Patch
+
+# Unchanged lines shown around each change, as in diff -u
+CONTEXT_LINES = 3
+
+@dataclass(slots=True)
+class DiffPreview:
+	"""The unified diff of a pending removal and what it changes in size."""
+	text: str = ""
+	lines_removed: int = 0
+	lines_added: int = 0
+	bytes_before: int = 0
+	bytes_after: int = 0
+	files: List[str] = field(default_factory=list)
+
+	@property
+	def bytes_saved(self) -> int:
+		return self.bytes_before - self.bytes_after
+
+	@property
+	def is_empty(self) -> bool:
+		return not self.lines_removed and not self.lines_added
+
+# One patch widened to whole lines: byte range, first line number and its old and new lines
+_Change = Tuple[int, int, int, List[bytes], List[bytes]]
+
+def _line_start(data: bytes, pos: int) -> int:
+	return data.rfind(b"\n", 0, pos) + 1
+
+def _line_end(data: bytes, pos: int) -> int:
+	if pos == 0 or data[pos - 1:pos] == b"\n":
+		return pos
+	end = data.find(b"\n", pos)
+	return len(data) if end == -1 else end + 1
+
+def _lines_before(data: bytes, pos: int, count: int) -> List[bytes]:
+	"""Return up to count whole lines ending at pos."""
+	start = pos
+	for _ in range(count):
+		if start == 0:
+			break
+		start = _line_start(data, start - 1)
+	return data[start:pos].splitlines(keepends=True)
+
+def _lines_after(data: bytes, pos: int, count: int) -> List[bytes]:
+	"""Return up to count whole lines starting at pos."""
+	end = pos
+	for _ in range(count):
+		if end >= len(data):
+			break
+		newline = data.find(b"\n", end)
+		end = len(data) if newline == -1 else newline + 1
+	return data[pos:end].splitlines(keepends=True)
+
+def _coalesce(patches: Iterable[Patch]) -> List[Patch]:
+	"""Sort patches and join the ones touching each other, such as consecutive deleted lines."""
+	merged: List[Patch] = []
+	for start, end, replacement in sorted(patches):
+		if merged and merged[-1][1] == start:
+			previous_start, _previous_end, previous_replacement = merged[-1]
+			merged[-1] = (previous_start, end, previous_replacement + replacement)
+		else:
+			merged.append((start, end, replacement))
+	return merged
+
+def _iter_changes(data: bytes, patches: Iterable[Patch]) -> Iterable[_Change]:
+	"""Widen patches to whole lines, numbering lines as they go.
+	Only the newlines between consecutive patches are counted, so the cost
+	follows the patched ranges rather than the lines shown.
+	"""
+	line = 0
+	counted = 0
+	for start, end, replacement in _coalesce(patches):
+		first = _line_start(data, start)
+		last = _line_end(data, end)
+		line += data.count(b"\n", counted, first)
+		counted = first
+		old = data[first:last]
+		new = data[first:start] + replacement + data[end:last]
+		yield first, last, line, old.splitlines(keepends=True), new.splitlines(keepends=True)
+
+def _format_lines(prefix: str, lines: List[bytes], out: List[str]):
+	for line in lines:
+		out.append(prefix + line.rstrip(b"\r\n").decode("utf-8", errors="replace"))
+
+def _range(start: int, count: int) -> str:
+	# diff -u numbers an empty range by the line before it
+	if count == 0:
+		return f"{start},0"
+	return f"{start + 1}" if count == 1 else f"{start + 1},{count}"
+
+def build_diff_preview(data: bytes, patches: List[Patch], name: str, context: int = CONTEXT_LINES) -> DiffPreview:
+	"""Return the unified diff of applying non-overlapping patches to data.
+	Only the patched lines and their context are decoded; the rest of the file
+	is skipped with C level searches, so large removals preview in milliseconds.
+	"""
+	preview = DiffPreview(bytes_before=len(data), bytes_after=len(data))
+	changes = list(_iter_changes(data, patches))
+	if not changes:
+		return preview
+	out = [f"--- {name}", f"+++ {name}"]
+	offset = 0
+	i = 0
+	while i < len(changes):
+		# Changes whose context overlaps share one hunk
+		j = i + 1
+		while j < len(changes):
+			previous_end = changes[j - 1][2] + len(changes[j - 1][3])
+			if changes[j][2] - previous_end > 2 * context:
+				break
+			j += 1
+		first_start, _, first_line, _, _ = changes[i]
+		before = _lines_before(data, first_start, context)
+		body: List[str] = []
+		_format_lines(" ", before, body)
+		old_count = new_count = len(before)
+		for k in range(i, j):
+			start, end, line, old, new = changes[k]
+			if k > i:
+				gap = data[changes[k - 1][1]:start].splitlines(keepends=True)
+				_format_lines(" ", gap, body)
+				old_count += len(gap)
+				new_count += len(gap)
+			_format_lines("-", old, body)
+			_format_lines("+", new, body)
+			old_count += len(old)
+			new_count += len(new)
+			preview.lines_removed += len(old)
+			preview.lines_added += len(new)
+			preview.bytes_after += sum(map(len, new)) - sum(map(len, old))
+		after = _lines_after(data, changes[j - 1][1], context)
+		_format_lines(" ", after, body)
+		old_count += len(after)
+		new_count += len(after)
+		old_start = first_line - len(before)
+		out.append(f"@@ -{_range(old_start, old_count)} +{_range(old_start + offset, new_count)} @@")
+		out.extend(body)
+		offset += new_count - old_count
+		i = j
+	preview.text = "\n".join(out) + "\n"
+	preview.files.append(name)
+	return preview
+
+def merge_previews(previews: Iterable[DiffPreview]) -> DiffPreview:
+	"""Combine the previews of several files into one."""
+	merged = DiffPreview()
+	texts = []
+	for preview in previews:
+		if preview.text:
+			texts.append(preview.text)
+		merged.lines_removed += preview.lines_removed
+		merged.lines_added += preview.lines_added
+		merged.bytes_before += preview.bytes_before
+		merged.bytes_after += preview.bytes_after
+		merged.files.extend(preview.files)
+	merged.text = "".join(texts)
+	return merged
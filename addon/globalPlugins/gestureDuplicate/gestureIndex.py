@@ -0,0 +1,58 @@
+# gestureIndex.py
+
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple
+import inputCore
+from logHandler import log
+from .analysis import script_section
+
+# (category, script key, script info) as returned by getAllGestureMappings()
+MappingEntry = Tuple[str, str, Any]
+
+def section_for(script_info: Any) -> str:
+	"""Return the gestures.ini section name ("module.Class") of a script info."""
+	return script_section(getattr(script_info, 'className', "Unknown"), getattr(script_info, 'moduleName', None))
+
+class GestureMappingIndex:
+	"""Immutable snapshot of all gesture mappings, built once per load.
+
+	Holds the flattened mapping entries for scans and a (section, scriptName)
+	lookup table for display-name resolution, so callers never have to ask
+	inputCore for the full mapping tree more than once.
+	"""
+
+	__slots__ = ("_entries", "_by_script")
+
+	def __init__(self, all_mappings: Mapping[str, Mapping[str, Any]]):
+		entries = []
+		by_script: Dict[Tuple[str, str], Any] = {}
+		for category, scripts in all_mappings.items():
+			for script_key, script_info in scripts.items():
+				entries.append((category, script_key, script_info))
+				script_name = getattr(script_info, 'scriptName', None) or script_key
+				by_script.setdefault((section_for(script_info), script_name), script_info)
+		self._entries: Tuple[MappingEntry, ...] = tuple(entries)
+		self._by_script: Mapping[Tuple[str, str], Any] = MappingProxyType(by_script)
+
+	@classmethod
+	def build(cls) -> "GestureMappingIndex":
+		"""Fetch the current mappings from inputCore and index them."""
+		try:
+			return cls(inputCore.manager.getAllGestureMappings())
+		except Exception as e:
+			log.error(f"Error fetching gesture mappings: {e}")
+			return cls({})
+
+	@property
+	def entries(self) -> Tuple[MappingEntry, ...]:
+		return self._entries
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def display_name(self, section: str, script_name: str) -> str:
+		"""Return the user visible name of a script, falling back to its name."""
+		info = self._by_script.get((section, script_name))
+		if info is None:
+			return script_name
+		return getattr(info, 'displayName', None) or script_name
@@ -0,0 +1,206 @@
+# gesturesIni.py
+# Lightweight streaming reader and patcher for gestures.ini.
+# Works on the raw bytes of the file and has no NVDA dependencies.
+
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+_BOM = b"\xef\xbb\xbf"
+
+# (start, end, replacement) byte range patch against the original file
+Patch = Tuple[int, int, bytes]
+
+class GestureEntry(NamedTuple):
+	section: str
+	gesture: str
+	scripts: Tuple[str, ...]
+	# Byte offsets of the whole line, including its line break
+	start: int
+	end: int
+
+class SectionHeader(NamedTuple):
+	section: str
+	start: int
+	end: int
+
+def _iter_lines(data: bytes) -> Iterator[Tuple[int, int, str]]:
+	"""Yield (start, end, text) for every line, with offsets into data."""
+	pos = len(_BOM) if data.startswith(_BOM) else 0
+	length = len(data)
+	while pos < length:
+		end = data.find(b"\n", pos)
+		end = length if end == -1 else end + 1
+		yield pos, end, data[pos:end].decode("utf-8", errors="replace")
+		pos = end
+
+def _split_unquoted(text: str, separator: str) -> List[str]:
+	"""Split text on separator, ignoring separators inside quotes."""
+	parts = []
+	current = []
+	quote = ""
+	for char in text:
+		if quote:
+			if char == quote:
+				quote = ""
+			current.append(char)
+		elif char in "\"'":
+			quote = char
+			current.append(char)
+		elif char == separator:
+			parts.append("".join(current))
+			current = []
+		else:
+			current.append(char)
+	parts.append("".join(current))
+	return parts
+
+def _unquote(text: str) -> str:
+	text = text.strip()
+	if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+		return text[1:-1]
+	return text
+
+def _parse_value(raw: str) -> Tuple[str, ...]:
+	"""Parse a ConfigObj style value, which may be a comma separated list."""
+	value = _split_unquoted(raw, "#")[0].strip()
+	if not value:
+		return ()
+	return tuple(_unquote(part) for part in _split_unquoted(value, ",") if part.strip())
+
+def _parse_key_value(text: str):
+	stripped = text.lstrip()
+	if stripped[:1] in "\"'":
+		close = stripped.find(stripped[0], 1)
+		if close == -1:
+			return None
+		key = stripped[1:close]
+		rest = stripped[close + 1:].lstrip()
+		if not rest.startswith("="):
+			return None
+		return key, rest[1:]
+	key, sep, value = stripped.partition("=")
+	if not sep:
+		return None
+	return key.strip(), value
+
+def iter_gestures_ini(data: bytes) -> Iterator:
+	"""Stream the contents of gestures.ini.
+	Yields a SectionHeader for every section and a GestureEntry for every gesture line.
+	"""
+	section = ""
+	for start, end, line in _iter_lines(data):
+		text = line.strip()
+		if not text or text.startswith("#"):
+			continue
+		if text.startswith("["):
+			section = text.strip("[]").strip()
+			yield SectionHeader(section, start, end)
+			continue
+		if not section:
+			continue
+		parsed = _parse_key_value(line)
+		if parsed is None:
+			continue
+		gesture, raw_value = parsed
+		yield GestureEntry(section, gesture, _parse_value(raw_value), start, end)
+
+def iter_gesture_entries(data: bytes) -> Iterator[GestureEntry]:
+	"""Yield only the gesture lines of gestures.ini."""
+	for item in iter_gestures_ini(data):
+		if isinstance(item, GestureEntry):
+			yield item
+
+def _format_line(line: bytes, scripts: List[str]) -> bytes:
+	"""Rewrite the value of a gesture line, keeping its key and indentation."""
+	text = line.decode("utf-8", errors="replace")
+	indent = text[:len(text) - len(text.lstrip())]
+	parsed = _parse_key_value(text)
+	key = parsed[0] if parsed else ""
+	if any(char in key for char in "=#,\"'[]") or key != key.strip():
+		key = f'"{key}"'
+	newline = text[len(text.rstrip("\r\n")):]
+	return f"{indent}{key} = {', '.join(scripts)}{newline}".encode("utf-8")
+
+def _section_patches(
+		data: bytes,
+		header: Optional[SectionHeader],
+		entries: List[GestureEntry],
+		removals: Dict[Tuple[str, str], Set[str]],
+		patches: List[Patch]
+):
+	"""Append the patches removing scripts from the gesture lines under one section header."""
+	section_patches: List[Patch] = []
+	remaining = 0
+	for item in entries:
+		to_remove = removals.get((item.section, item.gesture))
+		if not to_remove:
+			remaining += 1
+			continue
+		kept = [script for script in item.scripts if script not in to_remove]
+		if len(kept) == len(item.scripts):
+			remaining += 1
+		elif kept:
+			remaining += 1
+			section_patches.append((item.start, item.end, _format_line(data[item.start:item.end], kept)))
+		else:
+			section_patches.append((item.start, item.end, b""))
+	if header is not None and remaining == 0 and section_patches:
+		patches.append((header.start, header.end, b""))
+	patches.extend(section_patches)
+
+def build_removal_patches(data: bytes, removals: Dict[Tuple[str, str], Set[str]]) -> List[Patch]:
+	"""Compute the patches removing scripts from gestures.
+	removals maps (section, gesture) to the script names to drop. Lines left
+	without scripts are deleted, as are the headers of sections left empty.
+	"""
+	patches: List[Patch] = []
+	header = None
+	entries: List[GestureEntry] = []
+	for item in iter_gestures_ini(data):
+		if isinstance(item, SectionHeader):
+			_section_patches(data, header, entries, removals, patches)
+			header = item
+			entries = []
+		else:
+			entries.append(item)
+	_section_patches(data, header, entries, removals, patches)
+	return patches
+
+class GesturesIniIndex:
+	"""The gesture lines of gestures.ini grouped under their section headers, parsed once.
+	Removal patches then only visit the sections they touch.
+	"""
+
+	__slots__ = ("data", "_sections")
+
+	def __init__(self, data: bytes):
+		self.data = data
+		# section -> (header, gesture lines) of every header carrying that name
+		self._sections: Dict[str, List[Tuple[SectionHeader, List[GestureEntry]]]] = {}
+		entries = None
+		for item in iter_gestures_ini(data):
+			if isinstance(item, SectionHeader):
+				entries = []
+				self._sections.setdefault(item.section, []).append((item, entries))
+			elif entries is not None:
+				entries.append(item)
+
+	def removal_patches(self, removals: Dict[Tuple[str, str], Set[str]]) -> List[Patch]:
+		"""Same patches as build_removal_patches on the indexed data."""
+		patches: List[Patch] = []
+		for section in {section for section, _gesture in removals}:
+			for header, entries in self._sections.get(section, ()):
+				_section_patches(self.data, header, entries, removals, patches)
+		return patches
+
+def apply_patches(data: bytes, patches: List[Patch]) -> bytes:
+	"""Apply non-overlapping byte range patches to data."""
+	if not patches:
+		return data
+	chunks = []
+	pos = 0
+	for start, end, replacement in sorted(patches):
+		chunks.append(data[pos:start])
+		chunks.append(replacement)
+		pos = end
+	chunks.append(data[pos:])
+	return b"".join(chunks)
@@ -0,0 +1,337 @@
+# iniTransaction.py
+# Crash-safe, batched write-back for configuration files.
+
+import io
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Any, Collection, Dict, Iterable, List, Optional, Set, Tuple
+import config
+from logHandler import log
+from .gesturesIni import GesturesIniIndex, build_removal_patches, apply_patches
+from .analysis import build_key_removal_patches, build_section_removal_patches
+from .dryRun import DiffPreview, build_diff_preview, merge_previews
+
+# Number of rolling backups kept next to a rewritten file (file.bak1 is the newest)
+BACKUP_COUNT = 3
+
+# Transactions of the open dialogs, flushed if NVDA saves or the plugin terminates first
+_open_transactions: "weakref.WeakSet" = weakref.WeakSet()
+
+def _can_write() -> bool:
+	"""Whether NVDA may write its configuration: not with --secure or from the launcher."""
+	if getattr(config.conf, '_shouldWriteProfile', True):
+		return True
+	log.info("Not writing configuration, either --secure or --launcher args present")
+	return False
+
+def _rotate_backups(path: str, count: int = BACKUP_COUNT):
+	"""Shift file.bak1..file.bak<count-1> up by one and copy the current file to file.bak1."""
+	if count <= 0 or not os.path.exists(path):
+		return
+	for i in range(count - 1, 0, -1):
+		older = f"{path}.bak{i}"
+		if os.path.exists(older):
+			os.replace(older, f"{path}.bak{i + 1}")
+	shutil.copy2(path, f"{path}.bak1")
+
+def atomic_write(path: str, data: bytes, backups: int = BACKUP_COUNT):
+	"""Replace a file's contents without ever leaving it truncated.
+	The data is written and fsynced to a temporary file in the same directory,
+	the previous contents are kept as a rolling backup and the temporary file
+	is then renamed over the original.
+	"""
+	directory = os.path.dirname(os.path.abspath(path))
+	fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(data)
+			f.flush()
+			os.fsync(f.fileno())
+		_rotate_backups(path, backups)
+		os.replace(temp_path, path)
+	except BaseException:
+		try:
+			os.remove(temp_path)
+		except OSError:
+			pass
+		raise
+
+class GesturesIniTransaction:
+	"""Queues gesture removals from gestures.ini and commits them in one write."""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._removals: Dict[Tuple[str, str], Set[str]] = {}
+		# The file as read for the first preview, and indexed with the queued removals applied
+		self._data: Optional[bytes] = None
+		self._pending_index: Optional[GesturesIniIndex] = None
+		_open_transactions.add(self)
+
+	def queue_removal(self, section: str, gesture: str, script: str):
+		self._removals.setdefault((section, gesture), set()).add(script)
+		self._pending_index = None
+
+	def preview(self, removals: Dict[Tuple[str, str], Set[str]]) -> DiffPreview:
+		"""Return the diff removals would make on top of the queued ones, without writing.
+		The file is parsed once per batch of queued removals; each preview then
+		only visits the sections it touches.
+		"""
+		if self._data is None:
+			with open(self.path, "rb") as f:
+				self._data = f.read()
+		if self._pending_index is None:
+			data = self._data
+			if self._removals:
+				data = apply_patches(data, build_removal_patches(data, self._removals))
+			self._pending_index = GesturesIniIndex(data)
+		index = self._pending_index
+		return build_diff_preview(index.data, index.removal_patches(removals), os.path.basename(self.path))
+
+	@property
+	def pending_count(self) -> int:
+		return sum(len(scripts) for scripts in self._removals.values())
+
+	def discard(self):
+		self._removals.clear()
+		self._pending_index = None
+
+	def commit(self) -> bool:
+		"""Apply every queued removal with a single atomic write."""
+		if not self._removals:
+			return True
+		if not _can_write():
+			return False
+		try:
+			with open(self.path, "rb") as f:
+				data = f.read()
+			patches = build_removal_patches(data, self._removals)
+			if patches:
+				atomic_write(self.path, apply_patches(data, patches))
+			self._removals.clear()
+			self._data = None
+			self._pending_index = None
+			return True
+		except Exception as e:
+			log.error(f"Error writing {self.path}: {e}")
+			return False
+
+class ProfileSectionTransaction:
+	"""Queues top-level section and nested key deletions from a loaded configuration profile.
+	On commit they are dropped from the in-memory profile and the configuration
+	is saved through config.conf.save(), like any other settings change.
+	"""
+
+	def __init__(self, profile):
+		self.profile = profile
+		self._sections: List[str] = []
+		# (path of sections, key) of nested keys and subsections
+		self._keys: Set[Tuple[Tuple[str, ...], str]] = set()
+		_open_transactions.add(self)
+
+	def queue_removal(self, section: str):
+		if section not in self._sections:
+			self._sections.append(section)
+
+	def queue_key_removal(self, path: Tuple[str, ...], key: str):
+		self._keys.add((tuple(path), key))
+
+	@property
+	def pending(self) -> List[str]:
+		"""The top-level sections queued for deletion."""
+		return list(self._sections)
+
+	def is_pending(self, path: Tuple[str, ...], key: str) -> bool:
+		"""Whether the key at path, or a section holding it, is queued for deletion."""
+		names = tuple(path) + (key,)
+		if names[0] in self._sections:
+			return True
+		return any((names[:depth], names[depth]) in self._keys for depth in range(len(names)))
+
+	@property
+	def pending_count(self) -> int:
+		return len(self._sections) + len(self._keys)
+
+	def discard(self):
+		self._sections.clear()
+		self._keys.clear()
+
+	def preview(
+			self,
+			sections: Collection[str] = (),
+			keys: Collection[Tuple[Tuple[str, ...], str]] = ()
+	) -> DiffPreview:
+		"""Return the diff deleting sections and keys would make on top of the queued deletions.
+		The profile is serialized in memory; nothing is deleted or written.
+		"""
+		buffer = io.BytesIO()
+		self.profile.write(buffer)
+		data = buffer.getvalue()
+		queued = {((), name) for name in self._sections} | self._keys
+		if queued:
+			data = apply_patches(data, build_key_removal_patches(data, queued))
+		candidates = {((), name) for name in sections} | {(tuple(path), key) for path, key in keys}
+		name = os.path.basename(getattr(self.profile, 'filename', None) or "nvda.ini")
+		return build_diff_preview(data, build_key_removal_patches(data, candidates), name)
+
+	def _delete_key(self, path: Tuple[str, ...], key: str):
+		section = self.profile
+		for name in path:
+			section = section.get(name)
+			if section is None:
+				return
+		if key in section:
+			del section[key]
+
+	def apply(self):
+		"""Drop the queued deletions from the in-memory profile, without saving it."""
+		for name in self._sections:
+			if name in self.profile:
+				del self.profile[name]
+		for path, key in self._keys:
+			self._delete_key(path, key)
+		self.discard()
+
+	def commit(self) -> bool:
+		"""Apply the queued deletions and save the configuration. Nothing is changed if it may not be written."""
+		if not self._sections and not self._keys:
+			return True
+		if not _can_write():
+			return False
+		try:
+			self.apply()
+			config.conf.save()
+			return True
+		except Exception as e:
+			log.error(f"Error writing configuration: {e}")
+			return False
+
+	def flush(self) -> bool:
+		"""Patch the queued deletions straight into the profile file, then apply them.
+		Unlike commit, other unsaved settings stay unsaved.
+		"""
+		if not self._sections and not self._keys:
+			return True
+		if not _can_write():
+			return False
+		path = getattr(self.profile, 'filename', None)
+		if not path:
+			return False
+		try:
+			with open(path, "rb") as f:
+				data = f.read()
+			patches = build_key_removal_patches(data, {((), name) for name in self._sections} | self._keys)
+			if patches:
+				atomic_write(path, apply_patches(data, patches))
+			self.apply()
+			return True
+		except Exception as e:
+			log.error(f"Error writing {path}: {e}")
+			return False
+
+class ProfileFilesTransaction:
+	"""Queues section deletions across configuration profile files and commits them in one batch.
+	Each file is patched as raw text and written atomically, without activating
+	the profile. Profiles NVDA holds in memory get the same sections dropped, so
+	its own later saves do not bring them back.
+	"""
+
+	def __init__(self, loaded_profiles: Iterable[Any] = ()):
+		self.loaded_profiles = list(loaded_profiles)
+		self._removals: Dict[str, Set[str]] = {}
+		_open_transactions.add(self)
+
+	def queue_removal(self, path: str, section: str):
+		self._removals.setdefault(os.path.abspath(path), set()).add(section)
+
+	@property
+	def pending_count(self) -> int:
+		return sum(len(sections) for sections in self._removals.values())
+
+	def discard(self):
+		self._removals.clear()
+
+	def preview(self, removals: Dict[str, Collection[str]]) -> DiffPreview:
+		"""Return the diff of deleting sections from each profile file on top of the queued deletions.
+		Files are only read.
+		"""
+		previews = []
+		for path, sections in removals.items():
+			path = os.path.abspath(path)
+			with open(path, "rb") as f:
+				data = f.read()
+			queued = self._removals.get(path)
+			if queued:
+				data = apply_patches(data, build_section_removal_patches(data, queued))
+			patches = build_section_removal_patches(data, sections)
+			previews.append(build_diff_preview(data, patches, os.path.basename(path)))
+		return merge_previews(previews)
+
+	def _drop_from_loaded(self, path: str, sections: Set[str]):
+		for profile in self.loaded_profiles:
+			filename = getattr(profile, 'filename', None)
+			if not filename or os.path.normcase(os.path.abspath(filename)) != os.path.normcase(path):
+				continue
+			for name in sections:
+				if name in profile:
+					del profile[name]
+
+	def commit(self) -> bool:
+		"""Apply every queued deletion, one atomic write per file. Failed files stay queued."""
+		if not self._removals:
+			return True
+		if not _can_write():
+			return False
+		ok = True
+		for path, sections in list(self._removals.items()):
+			try:
+				with open(path, "rb") as f:
+					data = f.read()
+				patches = build_section_removal_patches(data, sections)
+				if patches:
+					atomic_write(path, apply_patches(data, patches))
+				self._drop_from_loaded(path, sections)
+				del self._removals[path]
+			except Exception as e:
+				log.error(f"Error writing {path}: {e}")
+				ok = False
+		return ok
+
+def flush_pending() -> bool:
+	"""Write what the open dialogs queued, e.g. when the plugin terminates with a dialog open.
+	Profile deletions are patched into the profile file rather than saved with
+	config.conf.save(), which would also write settings the user did not save.
+	"""
+	ok = True
+	for transaction in list(_open_transactions):
+		if isinstance(transaction, ProfileSectionTransaction):
+			ok = transaction.flush() and ok
+		else:
+			ok = transaction.commit() and ok
+	return ok
+
+def _on_pre_config_save(*args, **kwargs):
+	"""NVDA is about to save: fold queued deletions into the profile it writes, flush the rest."""
+	for transaction in list(_open_transactions):
+		try:
+			if isinstance(transaction, ProfileSectionTransaction):
+				transaction.apply()
+			else:
+				transaction.commit()
+		except Exception as e:
+			log.error(f"Error flushing queued removals: {e}")
+
+def register_save_handler():
+	point = getattr(config, 'pre_configSave', None)
+	if point is not None:
+		point.register(_on_pre_config_save)
+
+def unregister_save_handler():
+	point = getattr(config, 'pre_configSave', None)
+	if point is None:
+		return
+	try:
+		point.unregister(_on_pre_config_save)
+	except Exception as e:
+		log.debug(f"Error unregistering handler: {e}")
@@ -0,0 +1,130 @@
+# instrumentation.py
+# Opt-in timing of the add-on's hot paths, written to the NVDA log.
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+import config
+import addonHandler
+from logHandler import log
+
+try:
+	addonHandler.initTranslation()
+except addonHandler.AddonError:
+	log.warning("Unable to init translations.")
+
+CONFIG_SECTION = "gestureDuplicate"
+confspec = {
+	"logTimings": "boolean(default=False)",
+}
+# Number of finished runs kept for the summary
+SUMMARY_SIZE = 20
+
+_summary: Deque[str] = deque(maxlen=SUMMARY_SIZE)
+
+def is_enabled() -> bool:
+	try:
+		return bool(config.conf[CONFIG_SECTION]["logTimings"])
+	except Exception:
+		return False
+
+def set_enabled(enabled: bool):
+	config.conf[CONFIG_SECTION]["logTimings"] = enabled
+
+class _Stage:
+	__slots__ = ("_run", "_name", "_start", "count")
+
+	def __init__(self, run: "TimingRun", name: str, count: int):
+		self._run = run
+		self._name = name
+		self._start = 0
+		self.count = count
+
+	def __enter__(self) -> "_Stage":
+		self._start = time.perf_counter_ns()
+		return self
+
+	def __exit__(self, *exc_info):
+		self._run.add(self._name, time.perf_counter_ns() - self._start, self.count)
+
+class TimingRun:
+	"""Durations and item counts of the stages of one dialog session.
+	Stages may be recorded from several threads; repeated stages accumulate.
+	"""
+
+	def __init__(self, name: str):
+		self.name = name
+		self._lock = threading.Lock()
+		# stage name -> [elapsed ns, item count, calls]
+		self._stages: Dict[str, List[int]] = {}
+
+	def stage(self, name: str, count: int = 0) -> _Stage:
+		"""Time a with block. The item count may also be set on the returned object."""
+		return _Stage(self, name, count)
+
+	def add(self, name: str, elapsed_ns: int, count: int = 0):
+		with self._lock:
+			totals = self._stages.setdefault(name, [0, 0, 0])
+			totals[0] += elapsed_ns
+			totals[1] += count
+			totals[2] += 1
+
+	def _format(self) -> str:
+		with self._lock:
+			stages: List[Tuple[str, List[int]]] = list(self._stages.items())
+		parts = []
+		for name, (elapsed_ns, count, calls) in stages:
+			text = f"{name} {elapsed_ns / 1e6:.1f} ms"
+			details = []
+			if count:
+				details.append(f"{count} items")
+			if calls > 1:
+				details.append(f"{calls} calls")
+			if details:
+				text += f" ({', '.join(details)})"
+			parts.append(text)
+		return f"{self.name}: " + "; ".join(parts)
+
+	def finish(self):
+		"""Write the run to the NVDA log and the rolling summary."""
+		if not self._stages:
+			return
+		line = self._format()
+		log.info(f"Gesture Duplicate timings - {line}")
+		_summary.append(f"{time.strftime('%H:%M:%S')} {line}")
+
+class _NullStage:
+	__slots__ = ("count",)
+
+	def __init__(self):
+		self.count = 0
+
+	def __enter__(self) -> "_NullStage":
+		return self
+
+	def __exit__(self, *exc_info):
+		pass
+
+class _NullRun:
+	"""Stand-in used while timing is disabled, so call sites never need to check."""
+
+	def stage(self, name: str, count: int = 0) -> _NullStage:
+		return _NullStage()
+
+	def add(self, name: str, elapsed_ns: int, count: int = 0):
+		pass
+
+	def finish(self):
+		pass
+
+def start_run(name: str):
+	"""Return a TimingRun, or a no-op stand-in when timing is disabled."""
+	if is_enabled():
+		return TimingRun(name)
+	return _NullRun()
+
+def get_summary() -> str:
+	if not _summary:
+		return _("No timings recorded yet. Enable timing logging and open a dialog.")
+	return "\n".join(_summary)
@@ -2,13 +2,20 @@
 
 import wx
 import os
-import globalVars
 import gui
 import ui
 from logHandler import log
-import inputCore
 import addonHandler
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Optional, Tuple
+from .gestureIndex import GestureMappingIndex
+from .addonIndex import get_config_dir, get_installed_addon_index, addons_signature, InstalledAddonIndex
+from .records import IniGesture
+from .analysis import AddonGestureIndex, load_addon_gestures
+from .iniTransaction import GesturesIniTransaction
+from .dryRun import DiffPreview
+from .previewDialog import confirm_removal
+from . import instrumentation, scanSnapshot
+from .displayText import get_context, get_gesture_display
 
 try:
 	addonHandler.initTranslation()
@@ -22,39 +29,34 @@ class MyGesturesManagementDialog(wx.Dialog):
 		# Add STAY_ON_TOP style
 		super().__init__(parent, title=_("My Gestures Management"), size=(850, 600),
 		                 style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER | wx.STAY_ON_TOP)
-		self.all_gestures: List[Dict] = []
+		# Every add-on gesture of gestures.ini, grouped by add-on and section
+		self.gesture_index = AddonGestureIndex()
 		self.selected_addon = ""
-		self.addon_sections: Dict[str, List[str]] = {}
 		self.ini_path = ""
-		self.gestures_data: List[Dict] = []      # filtered list of gestures (current view)
+		self.gestures_data: List[IniGesture] = []      # filtered list of gestures (current view)
 		self.checked_indices: Set[int] = set()   # indices in gestures_data that are checked
+		self.mapping_index: Optional[GestureMappingIndex] = None
+		self.installed_index: Optional[InstalledAddonIndex] = None
+		self._label_cache: Dict[Tuple[str, str, str], str] = {}
+		# Removals are queued here and written in one go when the dialog closes
+		self.transaction: Optional[GesturesIniTransaction] = None
+		self.timing = instrumentation.start_run("My gestures management dialog")
 		self.SetEscapeId(wx.ID_CLOSE)
 		self._setup_ui()
 		self._load_gestures_from_ini()
-		self.Bind(wx.EVT_CLOSE, lambda e: self.Destroy())
+		self.Bind(wx.EVT_CLOSE, self.onClose)
 
 		# Bring dialog to front
 		self.Raise()
 		wx.CallAfter(self.addon_combo.SetFocus)
 
 	def _get_gesture_display(self, gesture: str) -> str:
-		try:
-			display_text = inputCore.getDisplayTextForGestureIdentifier(gesture)
-			if display_text and len(display_text) >= 2:
-				return display_text[1]
-		except:
-			pass
-		return gesture
+		return get_gesture_display(gesture)
 
 	def _get_script_display_name(self, script_name: str, section: str) -> str:
-		try:
-			all_mappings = inputCore.manager.getAllGestureMappings()
-			if section in all_mappings and script_name in all_mappings[section]:
-				info = all_mappings[section][script_name]
-				return getattr(info, 'displayName', None) or script_name
-		except:
-			pass
-		return script_name
+		if self.mapping_index is None:
+			return script_name
+		return self.mapping_index.display_name(section, script_name)
 
 	def _get_context_display(self, section: str) -> str:
 		if section.startswith("globalPlugins."):
@@ -99,6 +101,7 @@ class MyGesturesManagementDialog(wx.Dialog):
 		self.clearBtn.Bind(wx.EVT_BUTTON, self.onClearAll)
 
 		closeBtn = wx.Button(self, wx.ID_CLOSE, label=_("Close"))
+		closeBtn.Bind(wx.EVT_BUTTON, lambda e: self.Close())
 
 		btn_sizer.Add(self.deleteBtn, 0, wx.LEFT, 10)
 		btn_sizer.Add(self.clearBtn, 0, wx.LEFT, 10)
@@ -109,15 +112,13 @@ class MyGesturesManagementDialog(wx.Dialog):
 		self.SetSizer(main_sizer)
 
 	def _get_gestures_ini_path(self):
-		config_dir = getattr(globalVars.appArgs, 'configPath', None)
-		if not config_dir:
-			config_dir = os.path.join(os.environ.get('APPDATA', ''), 'nvda')
-		return os.path.join(config_dir, "gestures.ini")
+		return os.path.join(get_config_dir(), "gestures.ini")
 
 	def _load_gestures_from_ini(self):
-		self.all_gestures = []
-		self.addon_sections = {}
+		self.gesture_index = AddonGestureIndex()
+		self._label_cache.clear()
 		self.ini_path = self._get_gestures_ini_path()
+		self.transaction = GesturesIniTransaction(self.ini_path)
 
 		if not os.path.exists(self.ini_path):
 			self.clearBtn.Disable()
@@ -125,107 +126,99 @@ class MyGesturesManagementDialog(wx.Dialog):
 			return
 
 		try:
-			from configobj import ConfigObj
-			conf = ConfigObj(self.ini_path, encoding="utf-8", list_values=False)
-
-			for section in conf.sections:
-				for gesture_id in conf[section]:
-					script_value = conf[section][gesture_id]
-					if isinstance(script_value, list):
-						script_list = script_value
-					else:
-						script_list = [script_value]
-
-					for script_name in script_list:
-						if script_name == "None":
-							continue
-
-						is_addon = False
-						addon_name = ""
-						if section.startswith("globalPlugins."):
-							parts = section.split('.')
-							if len(parts) > 1:
-								addon_module_name = parts[1]
-								if addon_module_name.lower() not in ['main', 'run']:
-									is_addon = True
-									addon_name = addon_module_name
-						elif section.startswith("appModules."):
-							parts = section.split('.')
-							if len(parts) > 1:
-								addon_name = parts[1]
-								is_addon = True
-
-						if is_addon:
-							display_name = self._get_script_display_name(script_name, section)
-							self.all_gestures.append({
-								'section': section,
-								'gesture': gesture_id,
-								'script': script_name,
-								'display_name': display_name,
-								'is_addon': True,
-								'addon_name': addon_name,
-								'is_still_installed': self._is_addon_still_installed(addon_name, section)
-							})
-							if addon_name not in self.addon_sections:
-								self.addon_sections[addon_name] = []
-							if section not in self.addon_sections[addon_name]:
-								self.addon_sections[addon_name].append(section)
+			snapshot_key = self._get_snapshot_key()
+			with self.timing.stage("snapshot read") as stage:
+				stored = scanSnapshot.load("addon_gestures", snapshot_key, IniGesture)
+				stage.count = len(stored or ())
+			if stored is not None:
+				with self.timing.stage("grouping", len(stored)):
+					self.gesture_index = AddonGestureIndex(stored)
+			else:
+				gestures = self._parse_gestures_ini()
+				with self.timing.stage("snapshot write", len(gestures)):
+					scanSnapshot.save("addon_gestures", snapshot_key, gestures)
 
 			self._apply_filter()
 			self._populate_addon_combo()
 		except Exception as e:
 			log.error(f"Error loading gestures: {e}")
 
-	def _is_addon_still_installed(self, addon_name: str, section: str) -> bool:
-		try:
-			for addon in addonHandler.getAvailableAddons():
-				if (addon.name == addon_name or
-					addon.manifest.get('name') == addon_name or
-					addon.manifest.get('summary') == addon_name):
-					return True
-			if section.startswith("appModules."):
-				return True
-			return False
-		except:
-			return False
+	def _get_snapshot_key(self) -> str:
+		"""Key of the stored gestures: changes with gestures.ini, the installed add-ons and
+		the keyboard layout and language script names are shown in.
+		"""
+		return scanSnapshot.make_key(scanSnapshot.file_key("gestures.ini"), addons_signature(), get_context())
+
+	def _parse_gestures_ini(self) -> List[IniGesture]:
+		"""Read gestures.ini, build the gesture records and group them by add-on.
+		Returns the records in file order.
+		"""
+		with self.timing.stage("ini read") as stage:
+			with open(self.ini_path, "rb") as f:
+				data = f.read()
+			stage.count = len(data)
+		# Built once per load and shared by every gesture record below
+		with self.timing.stage("mapping fetch") as stage:
+			self.mapping_index = GestureMappingIndex.build()
+			stage.count = len(self.mapping_index)
+		with self.timing.stage("add-on index"):
+			self.installed_index = get_installed_addon_index()
+
+		with self.timing.stage("ini parse") as stage:
+			gestures = load_addon_gestures(data, self.installed_index.names, self._get_script_display_name)
+			stage.count = len(gestures)
+		with self.timing.stage("grouping", len(gestures)):
+			self.gesture_index = AddonGestureIndex(gestures)
+		return gestures
 
 	def _populate_addon_combo(self):
 		self.addon_combo.Clear()
 		self.addon_combo.Append(_("All addons"), "")
-		for addon_name in sorted(self.addon_sections.keys(), key=lambda x: x.lower()):
-			self.addon_combo.Append(addon_name, addon_name)
+		for addon_name in sorted(self.gesture_index.addons, key=lambda x: x.lower()):
+			count = self.gesture_index.count(addon_name)
+			self.addon_combo.Append(f"{addon_name} ({count})", addon_name)
 		self.addon_combo.SetSelection(0)
 		self.selected_addon = ""
 
 	def _apply_filter(self):
 		"""Filter gestures based on selected addon and store in self.gestures_data."""
-		filtered = self.all_gestures
-		if self.selected_addon and self.selected_addon in self.addon_sections:
-			addon_sections = self.addon_sections[self.selected_addon]
-			filtered = [g for g in filtered if g['section'] in addon_sections]
-		self.gestures_data = filtered
+		if self.selected_addon and self.selected_addon in self.gesture_index:
+			self.gestures_data = self.gesture_index.gestures(self.selected_addon)
+		else:
+			self.gestures_data = self.gesture_index.gestures()
 		self.checked_indices.clear()
 		self._populate_checklist()
 
-	def _populate_checklist(self):
-		"""Populate the check list with formatted gesture strings."""
-		self.checkList.Clear()
-		for i, item in enumerate(self.gestures_data):
-			gesture_display = self._get_gesture_display(item['gesture'])
-			function_name = item['display_name']
+	def _get_label(self, item: IniGesture) -> str:
+		"""Return the "gesture | function | context" label of a gesture, memoized per load."""
+		key = (item.section, item.gesture, item.script)
+		label = self._label_cache.get(key)
+		if label is None:
+			gesture_display = self._get_gesture_display(item.gesture)
+			function_name = item.display_name
 			if function_name.startswith("Function: "):
 				function_name = function_name[10:]
-			context_name = self._get_context_display(item['section'])
-
-			# Format: "Gesture: ... | Function: ... | Context: ..."
-			label = f"{gesture_display} | {function_name} | {context_name}"
-			self.checkList.Append(label)
-
-			# Mark colour for uninstalled addons (gray text)
-			if not item['is_still_installed']:
-				self.checkList.SetItemForegroundColour(i, wx.Colour(128, 128, 128))
+			context_name = self._get_context_display(item.section)
+			label = self._label_cache[key] = f"{gesture_display} | {function_name} | {context_name}"
+		return label
 
-		self.clearBtn.Enable(len(self.all_gestures) > 0)
+	def _populate_checklist(self):
+		"""Populate the check list with formatted gesture strings in a single batch."""
+		with self.timing.stage("display text", len(self.gestures_data)):
+			labels = [self._get_label(item) for item in self.gestures_data]
+		self.checkList.Freeze()
+		try:
+			with self.timing.stage("widget population", len(labels)):
+				self.checkList.Set(labels)
+				# Mark colour for uninstalled addons (gray text)
+				gray = wx.Colour(128, 128, 128)
+				for i, item in enumerate(self.gestures_data):
+					if not item.is_still_installed:
+						self.checkList.SetItemForegroundColour(i, gray)
+		finally:
+			self.checkList.Thaw()
+
+		self.clearBtn.Enable(len(self.gesture_index) > 0)
 		self._update_delete_button()
 
 	def onCheckToggle(self, event):
@@ -278,54 +271,61 @@ class MyGesturesManagementDialog(wx.Dialog):
 				return
 		event.Skip()
 
-	def _remove_gestures_from_ini(self, items_to_remove: List[Dict]) -> bool:
-		"""Remove given gesture entries from gestures.ini."""
-		try:
-			from configobj import ConfigObj
-			conf = ConfigObj(self.ini_path, encoding="utf-8", list_values=False)
-
-			for item in items_to_remove:
-				section = item['section']
-				gesture = item['gesture']
-				script = item['script']
-
-				if section in conf and gesture in conf[section]:
-					current = conf[section][gesture]
-					if isinstance(current, list):
-						if script in current:
-							current.remove(script)
-							if not current:
-								del conf[section][gesture]
-							else:
-								conf[section][gesture] = current
-					else:
-						if current == script:
-							del conf[section][gesture]
-
-				if section in conf and not conf[section]:
-					del conf[section]
-
-			conf.write()
-			return True
-		except Exception as e:
-			log.error(f"Error removing gestures: {e}")
+	def _remove_gestures_from_ini(self, items_to_remove: List[IniGesture]) -> bool:
+		"""Queue given gesture entries for removal from gestures.ini."""
+		if self.transaction is None:
 			return False
+		for item in items_to_remove:
+			self.transaction.queue_removal(item.section, item.gesture, item.script)
+		return True
+
+	def _preview_removal(self, items_to_remove: List[IniGesture]) -> DiffPreview:
+		"""Return the diff removing the given entries would make to gestures.ini, without writing it."""
+		removals: Dict[Tuple[str, str], Set[str]] = {}
+		for item in items_to_remove:
+			removals.setdefault((item.section, item.gesture), set()).add(item.script)
+		return self.transaction.preview(removals)
+
+	def _confirm_removal(self, msg: str, items_to_remove: List[IniGesture]) -> bool:
+		if self.transaction is None:
+			return wx.MessageBox(msg, _("Confirm"), wx.YES_NO) == wx.YES
+		return confirm_removal(self, msg, lambda: self._preview_removal(items_to_remove))
+
+	def onClose(self, event):
+		"""Write queued removals in a single atomic write, then destroy the dialog."""
+		if self.transaction is not None and self.transaction.pending_count:
+			with self.timing.stage("ini write", self.transaction.pending_count):
+				if self.transaction.commit():
+					# The remaining gestures are still accurate, keep them for the next opening
+					scanSnapshot.save("addon_gestures", self._get_snapshot_key(), self.gesture_index.gestures())
+				else:
+					ui.message(_("Failed to save gestures."))
+		self.timing.finish()
+		self.Destroy()
+
+	def _discard_gestures(self, removed_items: List[IniGesture]):
+		"""Drop removed gestures from the loaded data instead of parsing gestures.ini again."""
+		self.gesture_index.discard(removed_items)
+		self._refresh_views()
+
+	def _refresh_views(self):
+		self._populate_addon_combo()
+		self._apply_filter()
 
 	def _remove_selected_addon(self):
 		"""Remove all gestures for the currently selected addon."""
-		if not self.selected_addon or self.selected_addon not in self.addon_sections:
+		if not self.selected_addon or self.selected_addon not in self.gesture_index:
 			return
 
 		addon_name = self.selected_addon
-		items_to_remove = [g for g in self.all_gestures if g['addon_name'] == addon_name]
-		if not items_to_remove:
-			return
-
-		msg = _("Remove all {} custom gestures for addon '{}'?").format(len(items_to_remove), addon_name)
-		if wx.MessageBox(msg, _("Confirm"), wx.YES_NO) == wx.YES:
+		msg = _("Remove all {} custom gestures for addon '{}'?").format(
+			self.gesture_index.count(addon_name), addon_name)
+		items_to_remove = self.gesture_index.gestures(addon_name)
+		if self._confirm_removal(msg, items_to_remove):
 			if self._remove_gestures_from_ini(items_to_remove):
-				ui.message(_("Success"))
-				self._load_gestures_from_ini()
+				ui.message(_("Queued for removal. Changes are saved when this dialog closes."))
+				self.gesture_index.remove_addon(addon_name)
+				self._refresh_views()
 				self._update_delete_button()
 				wx.CallAfter(self.addon_combo.SetFocus)
 			else:
@@ -339,10 +339,10 @@ class MyGesturesManagementDialog(wx.Dialog):
 
 		items_to_remove = [self.gestures_data[i] for i in self.checked_indices]
 		msg = _("Remove {} selected gesture(s)?").format(len(items_to_remove))
-		if wx.MessageBox(msg, _("Confirm"), wx.YES_NO) == wx.YES:
+		if self._confirm_removal(msg, items_to_remove):
 			if self._remove_gestures_from_ini(items_to_remove):
-				ui.message(_("Success"))
-				self._load_gestures_from_ini()
+				ui.message(_("Queued for removal. Changes are saved when this dialog closes."))
+				self._discard_gestures(items_to_remove)
 				self._update_delete_button()
 				wx.CallAfter(self.addon_combo.SetFocus)
 			else:
@@ -356,17 +356,18 @@ class MyGesturesManagementDialog(wx.Dialog):
 
 	def onClearAll(self, event):
 		"""Remove all addon gestures."""
-		if not self.all_gestures:
+		if not len(self.gesture_index):
 			ui.message(_("No addon gestures to clear."))
 			return
 
 		msg = _("Remove all {} custom gestures from {} addons?").format(
-			len(self.all_gestures), len(self.addon_sections))
-		if wx.MessageBox(msg, _("Confirm"), wx.YES_NO | wx.ICON_WARNING) == wx.YES:
-			items_to_remove = self.all_gestures[:]
+			len(self.gesture_index), len(self.gesture_index.addons))
+		items_to_remove = self.gesture_index.gestures()
+		if self._confirm_removal(msg, items_to_remove):
 			if self._remove_gestures_from_ini(items_to_remove):
-				ui.message(_("Success"))
-				self._load_gestures_from_ini()
+				ui.message(_("Queued for removal. Changes are saved when this dialog closes."))
+				self.gesture_index = AddonGestureIndex()
+				self._refresh_views()
 				self._update_delete_button()
 				wx.CallAfter(self.addon_combo.SetFocus)
 			else:
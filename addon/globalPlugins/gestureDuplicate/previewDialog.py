@@ -0,0 +1,78 @@
+# previewDialog.py
+# Confirmation of a removal, showing the diff it would make before anything is written.
+
+import wx
+import gui
+import addonHandler
+from logHandler import log
+from typing import Callable
+from .dryRun import DiffPreview
+
+addonHandler.initTranslation()
+
+def format_size(size: int) -> str:
+	if size < 1024:
+		return _("{} bytes").format(size)
+	return _("{:.1f} KB").format(size / 1024)
+
+def format_summary(preview: DiffPreview) -> str:
+	size = format_size(preview.bytes_saved)
+	if preview.lines_added:
+		# Lines rewritten with some of their scripts left
+		return _("{removed} lines removed, {added} rewritten, {size} saved.").format(
+			removed=preview.lines_removed - preview.lines_added, added=preview.lines_added, size=size
+		)
+	return _("{removed} lines removed, {size} saved.").format(removed=preview.lines_removed, size=size)
+
+class DiffPreviewDialog(wx.Dialog):
+	"""Asks to confirm a removal and shows its unified diff in a read-only text field."""
+
+	def __init__(self, parent, message: str, preview: DiffPreview):
+		super().__init__(parent, title=_("Confirm"), size=(700, 500),
+						style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER | wx.STAY_ON_TOP)
+		main_sizer = wx.BoxSizer(wx.VERTICAL)
+
+		text = wx.StaticText(self, label=f"{message}\n{format_summary(preview)}")
+		main_sizer.Add(text, 0, wx.ALL, 10)
+
+		files = ", ".join(preview.files)
+		diff_label = wx.StaticText(self, label=_("&Changes to {files}:").format(files=files))
+		main_sizer.Add(diff_label, 0, wx.LEFT | wx.RIGHT, 10)
+		self.diffText = wx.TextCtrl(
+			self, value=preview.text,
+			style=wx.TE_MULTILINE | wx.TE_READONLY | wx.TE_DONTWRAP | wx.HSCROLL
+		)
+		main_sizer.Add(self.diffText, 1, wx.ALL | wx.EXPAND, 10)
+
+		btn_sizer = wx.StdDialogButtonSizer()
+		yesBtn = wx.Button(self, wx.ID_YES)
+		yesBtn.Bind(wx.EVT_BUTTON, lambda e: self.EndModal(wx.YES))
+		btn_sizer.AddButton(yesBtn)
+		noBtn = wx.Button(self, wx.ID_NO)
+		noBtn.Bind(wx.EVT_BUTTON, lambda e: self.EndModal(wx.NO))
+		btn_sizer.AddButton(noBtn)
+		btn_sizer.Realize()
+		main_sizer.Add(btn_sizer, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
+
+		self.SetEscapeId(wx.ID_NO)
+		self.SetSizer(main_sizer)
+		yesBtn.SetDefault()
+		yesBtn.SetFocus()
+
+def confirm_removal(parent, message: str, make_preview: Callable[[], DiffPreview]) -> bool:
+	"""Show the diff of a removal and return whether the user confirmed it.
+	Falls back to a plain yes/no question if the diff cannot be computed, or
+	changes no saved line, as for settings only held in memory so far.
+	"""
+	try:
+		preview = make_preview()
+	except Exception as e:
+		log.error(f"Error computing the removal preview: {e}")
+		preview = None
+	if preview is None or preview.is_empty:
+		return gui.messageBox(message, _("Confirm"), wx.YES_NO | wx.ICON_WARNING, parent) == wx.YES
+	dialog = DiffPreviewDialog(parent, message, preview)
+	try:
+		return dialog.ShowModal() == wx.YES
+	finally:
+		dialog.Destroy()
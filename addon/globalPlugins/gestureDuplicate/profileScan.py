@@ -0,0 +1,71 @@
+# profileScan.py
+# Finds orphaned sections in the configuration profiles under profiles/.
+
+import concurrent.futures
+import os
+from typing import Any, Collection, Dict, List, Tuple
+import config
+from logHandler import log
+from .analysis import SECTION_ORPHANED, measure_config_sections
+from .records import ConfigSection, ProfileOrphan
+from .addonIndex import get_config_dir
+
+PROFILES_DIR = "profiles"
+# Profile files are small; a few threads are enough to overlap their reads
+_MAX_WORKERS = 4
+
+def list_profile_files() -> List[str]:
+	"""Return the paths of every configuration profile file, sorted by name."""
+	profiles_dir = os.path.join(get_config_dir(), PROFILES_DIR)
+	try:
+		names = os.listdir(profiles_dir)
+	except OSError:
+		return []
+	return [
+		os.path.join(profiles_dir, name)
+		for name in sorted(names, key=str.lower)
+		if name.lower().endswith(".ini")
+	]
+
+def get_loaded_profiles() -> List[Any]:
+	"""Return the profiles NVDA holds in memory, other than the base configuration."""
+	profiles = list(config.conf.profiles[1:])
+	# Profiles NVDA read earlier and keeps for the next switch
+	cache = getattr(config.conf, '_profileCache', None) or {}
+	profiles.extend(profile for profile in cache.values() if profile is not None)
+	return profiles
+
+def _scan_file(
+		path: str,
+		known_sections: Collection[str],
+		installed_names: Collection[str]
+) -> Tuple[str, List[ConfigSection]]:
+	with open(path, "rb") as f:
+		data = f.read()
+	sections = measure_config_sections(data, known_sections, installed_names)
+	return path, [section for section in sections if section.status == SECTION_ORPHANED]
+
+def scan_profiles(
+		paths: List[str],
+		known_sections: Collection[str],
+		installed_names: Collection[str]
+) -> List[ProfileOrphan]:
+	"""Read the profile files in parallel and return their orphaned sections, largest first."""
+	orphans: Dict[str, ProfileOrphan] = {}
+	with concurrent.futures.ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+		futures = [executor.submit(_scan_file, path, known_sections, installed_names) for path in paths]
+		for future in futures:
+			try:
+				path, sections = future.result()
+			except Exception as e:
+				log.debug(f"Skipping unreadable profile: {e}")
+				continue
+			profile_name = os.path.splitext(os.path.basename(path))[0]
+			for section in sections:
+				orphan = orphans.get(section.name)
+				if orphan is None:
+					orphan = orphans[section.name] = ProfileOrphan(section.name)
+				orphan.size += section.size
+				orphan.profiles.append(profile_name)
+				orphan.paths.append(path)
+	return sorted(orphans.values(), key=lambda orphan: (-orphan.size, orphan.name.lower()))
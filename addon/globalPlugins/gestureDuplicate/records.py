@@ -0,0 +1,71 @@
+# records.py
+# Compact record types for gesture and configuration data held for a dialog's lifetime.
+# Strings repeated across many records are interned by the code building them.
+
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+@dataclass(slots=True, eq=False)
+class GestureBinding:
+	"""One gesture bound to a script, as found when scanning the mappings."""
+	gesture: str
+	norm_gesture: str
+	category: str
+	display_name: str
+	class_name: str
+	script_name: str
+
+@dataclass(slots=True, eq=False)
+class IniGesture:
+	"""One script assigned to a gesture in a gestures.ini section of an add-on."""
+	section: str
+	gesture: str
+	script: str
+	display_name: str
+	addon_name: str
+	is_still_installed: bool
+
+@dataclass(slots=True, eq=False)
+class ConfigSection:
+	"""Footprint of one top-level nvda.ini section."""
+	name: str
+	# Serialized size in bytes, from the header to the next top-level section
+	size: int
+	# Keys in the section and all its subsections
+	keys: int
+	# 1 for a section without subsections
+	depth: int
+	# One of the analysis.SECTION_* values
+	status: str = ""
+
+@dataclass(slots=True, eq=False)
+class ProfileOrphan:
+	"""An orphaned section and the configuration profile files carrying it."""
+	name: str
+	# Total serialized size across all profiles, in bytes
+	size: int = 0
+	profiles: List[str] = field(default_factory=list)
+	paths: List[str] = field(default_factory=list)
+
+@dataclass(slots=True, eq=False)
+class ConfigKey:
+	"""A key or subsection of a configuration profile that its config spec does not know."""
+	# Sections leading to the key, outermost first
+	path: Tuple[str, ...]
+	key: str
+	# Estimated serialized size in bytes, subsections included
+	size: int
+	# Number of keys it holds: 1 for a plain key
+	keys: int
+	is_section: bool
+
+@dataclass(slots=True, eq=False)
+class ConfigFinding:
+	"""A configuration value which is redundant, invalid or unknown to the config spec."""
+	path: Tuple[str, ...]
+	key: str
+	value: str
+	# One of the configValidation.FINDING_* values
+	kind: str
+	# Estimated serialized size in bytes
+	size: int
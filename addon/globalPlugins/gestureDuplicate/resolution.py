@@ -0,0 +1,142 @@
+# resolution.py
+# Predicts which binding of a duplicate gesture NVDA actually runs.
+# Works on a ConflictGraph and has no NVDA dependencies.
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .conflictGraph import (
+	BindingContext, ConflictGraph, PRECEDENCE,
+	KIND_APP_MODULE, KIND_GLOBAL_COMMANDS, KIND_GLOBAL_PLUGIN,
+)
+from .records import GestureBinding
+
+# Runs wherever it is active
+STATUS_RUNS = "runs"
+# Runs in some applications or objects, hidden by another binding elsewhere
+STATUS_RUNS_SOMETIMES = "runsSometimes"
+# Hidden by a binding which is only active for some objects, runs otherwise
+STATUS_SHADOWED = "shadowed"
+# Always hidden by a binding of higher precedence: never runs
+STATUS_DEAD = "dead"
+# Tied with another binding at the same level; NVDA's load order, the focus or the loaded drivers decide
+STATUS_UNDECIDED = "undecided"
+
+# Kinds which are active for every gesture in their scope, whatever has the focus
+_UNCONDITIONAL_KINDS = frozenset((KIND_GLOBAL_PLUGIN, KIND_APP_MODULE, KIND_GLOBAL_COMMANDS))
+
+@dataclass(slots=True, frozen=True)
+class Precedence:
+	"""Position of a context in NVDA's script lookup. Lower levels are asked first."""
+	level: int
+	# The application the context is limited to, or "" if it is active everywhere
+	app: str
+	# Whether the context only applies to some focus objects
+	conditional: bool
+
+def precedence_of(context: BindingContext) -> Precedence:
+	try:
+		level = PRECEDENCE.index(context.kind)
+	except ValueError:
+		level = len(PRECEDENCE)
+	return Precedence(level, context.app, context.kind not in _UNCONDITIONAL_KINDS)
+
+@dataclass(slots=True, eq=False)
+class Resolution:
+	"""Outcome of one duplicate gesture.
+	winners maps each application scope ("" for everywhere else) to the binding
+	which runs there, or None if that is undecided.
+	"""
+	norm_gesture: str
+	winners: Dict[str, Optional[GestureBinding]]
+	dead: List[GestureBinding]
+
+class ResolutionTable:
+	"""Resolves every gesture of a conflict graph in one pass.
+
+	Follows NVDA's lookup order: global plugins, the braille display driver,
+	vision enhancement providers, the app module, the tree interceptor, the
+	focus object and its ancestors, then global commands. User gestures.ini
+	assignments are already part of each binding, so they take effect within
+	their level. Bindings of contexts which are only active sometimes (the
+	loaded braille display and vision providers, tree interceptors and object
+	classes) are assumed active when choosing a winner, but never make another
+	binding dead.
+	"""
+
+	def __init__(self, graph: ConflictGraph):
+		# section -> precedence, computed once per context
+		self._precedence: Dict[str, Precedence] = {}
+		self.resolutions: Dict[str, Resolution] = {}
+		self._status: Dict[GestureBinding, str] = {}
+		for norm, bindings in graph.nodes.items():
+			self.resolutions[norm] = self._resolve(graph, norm, bindings)
+
+	def _get_precedence(self, graph: ConflictGraph, section: str) -> Precedence:
+		precedence = self._precedence.get(section)
+		if precedence is None:
+			precedence = self._precedence[section] = precedence_of(graph.context_of(section))
+		return precedence
+
+	def _resolve(self, graph: ConflictGraph, norm: str, bindings: List[GestureBinding]) -> Resolution:
+		ranked = [(record, self._get_precedence(graph, record.class_name)) for record in bindings]
+		# Per application scope ("" for everywhere): the best unconditional level,
+		# and the best level with the bindings at it
+		unconditional: Dict[str, int] = {}
+		best: Dict[str, Tuple[int, List[GestureBinding]]] = {}
+		for record, precedence in ranked:
+			app = precedence.app
+			if not precedence.conditional:
+				level = unconditional.get(app)
+				if level is None or precedence.level < level:
+					unconditional[app] = precedence.level
+			current = best.get(app)
+			if current is None or precedence.level < current[0]:
+				best[app] = (precedence.level, [record])
+			elif precedence.level == current[0]:
+				current[1].append(record)
+		winners: Dict[str, Optional[GestureBinding]] = {}
+		undecided = set()
+		wins: Dict[GestureBinding, int] = {}
+		everywhere = best.get("")
+		for scope, (level, top) in best.items():
+			if scope and everywhere is not None:
+				if everywhere[0] < level:
+					top = everywhere[1]
+				elif everywhere[0] == level:
+					top = everywhere[1] + top
+			if len(top) == 1:
+				winners[scope] = top[0]
+				wins[top[0]] = wins.get(top[0], 0) + 1
+			else:
+				winners[scope] = None
+				undecided.update(top)
+		dead = []
+		for record, precedence in ranked:
+			# Best unconditional level active wherever this binding is
+			shadow = unconditional.get("")
+			if precedence.app:
+				app_level = unconditional.get(precedence.app)
+				if app_level is not None and (shadow is None or app_level < shadow):
+					shadow = app_level
+			if shadow is not None and shadow < precedence.level:
+				status = STATUS_DEAD
+				dead.append(record)
+			elif record in undecided:
+				status = STATUS_UNDECIDED
+			else:
+				active_scopes = 1 if precedence.app else len(best)
+				won = wins.get(record, 0)
+				if won == active_scopes:
+					status = STATUS_RUNS
+				elif won:
+					status = STATUS_RUNS_SOMETIMES
+				else:
+					status = STATUS_SHADOWED
+			self._status[record] = status
+		return Resolution(norm, winners, dead)
+
+	def status_of(self, record: GestureBinding) -> Optional[str]:
+		return self._status.get(record)
+
+	def dead_count(self) -> int:
+		return sum(len(resolution.dead) for resolution in self.resolutions.values())
@@ -0,0 +1,72 @@
+# scanSnapshot.py
+# Persists the last analysis results in the NVDA config directory, so dialogs
+# can start from them when nothing they depend on has changed.
+
+import dataclasses
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Type, TypeVar
+from logHandler import log
+from .addonIndex import get_config_dir
+from .iniTransaction import atomic_write
+
+SNAPSHOT_FILE = "gestureDuplicate-snapshot.json.gz"
+# Bump when the stored record layout changes, so old snapshots are ignored
+FORMAT_VERSION = 3
+
+RecordType = TypeVar("RecordType")
+
+_lock = threading.Lock()
+
+def _get_path() -> str:
+	return os.path.join(get_config_dir(), SNAPSHOT_FILE)
+
+def file_key(name: str) -> tuple:
+	"""(mtime, size) of a file in the NVDA config directory, or () if it does not exist."""
+	try:
+		st = os.stat(os.path.join(get_config_dir(), name))
+	except OSError:
+		return ()
+	return (st.st_mtime_ns, st.st_size)
+
+def make_key(*parts: Any) -> str:
+	"""Hash the given fingerprints into a snapshot key."""
+	return hashlib.sha1(repr((FORMAT_VERSION,) + parts).encode("utf-8")).hexdigest()
+
+def _read_all() -> Dict[str, Any]:
+	try:
+		with gzip.open(_get_path(), "rt", encoding="utf-8") as f:
+			data = json.load(f)
+	except FileNotFoundError:
+		return {}
+	except Exception as e:
+		log.debug(f"Ignoring unreadable snapshot: {e}")
+		return {}
+	return data if isinstance(data, dict) else {}
+
+def load(kind: str, key: str, record_type: Type[RecordType]) -> Optional[List[RecordType]]:
+	"""Return the stored records of kind if they were saved under key."""
+	with _lock:
+		entry = _read_all().get(kind)
+	if not isinstance(entry, dict) or entry.get("key") != key:
+		return None
+	try:
+		return [record_type(*row) for row in entry["rows"]]
+	except Exception as e:
+		log.debug(f"Ignoring invalid {kind} snapshot: {e}")
+		return None
+
+def save(kind: str, key: str, records: List[Any]):
+	"""Store records of kind under key, replacing the previous ones."""
+	rows = [dataclasses.astuple(record) for record in records]
+	with _lock:
+		data = _read_all()
+		data[kind] = {"key": key, "rows": rows}
+		try:
+			payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+			atomic_write(_get_path(), gzip.compress(payload), backups=0)
+		except Exception as e:
+			log.debug(f"Unable to save {kind} snapshot: {e}")
@@ -0,0 +1,49 @@
+# tokenIndex.py
+# Prefix search over the texts of list rows, for type-to-filter boxes.
+# Has no NVDA dependencies.
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set
+
+_TOKEN_RE = re.compile(r"\w+")
+# Sorts after every character, so prefix + _MAX_CHAR bounds all tokens starting with prefix
+_MAX_CHAR = "\U0010ffff"
+
+def tokenize(text: str) -> List[str]:
+	return _TOKEN_RE.findall(text.lower())
+
+class TokenIndex:
+	"""Sorted distinct lowercased words of the rows' texts, each with the rows holding it.
+
+	A query matches the rows holding, for every word of the query, a token that
+	starts with it. Each word costs two binary searches plus the matching range.
+	"""
+
+	__slots__ = ("_tokens", "_rows")
+
+	def __init__(self, rows: Iterable[Iterable[str]]):
+		by_token: Dict[str, Set[int]] = {}
+		for row, texts in enumerate(rows):
+			for text in texts:
+				for token in tokenize(text):
+					rows_of_token = by_token.get(token)
+					if rows_of_token is None:
+						by_token[token] = {row}
+					else:
+						rows_of_token.add(row)
+		self._tokens: List[str] = sorted(by_token)
+		self._rows: List[Set[int]] = [by_token[token] for token in self._tokens]
+
+	def match(self, query: str) -> Optional[Set[int]]:
+		"""Return the rows matching query, or None if query holds no words."""
+		result: Optional[Set[int]] = None
+		# Longest words first: they usually narrow the result the most
+		for prefix in sorted(set(tokenize(query)), key=len, reverse=True):
+			start = bisect_left(self._tokens, prefix)
+			end = bisect_right(self._tokens, prefix + _MAX_CHAR, start)
+			rows = set().union(*self._rows[start:end])
+			result = rows if result is None else result & rows
+			if not result:
+				break
+		return result
@@ -0,0 +1,309 @@
+# runBenchmarks.py
+# Copyright (C) 2026 Chai Chaimee
+# Licensed under GNU General Public License. See COPYING.txt for details.
+
+"""Benchmarks for the gesture scan, gestures.ini load/removal and nvda.ini cleanup paths.
+
+Runs outside NVDA against stubbed inputCore, config, addonHandler and wx modules,
+on synthetic inputs of growing size. Stages are named after what they run and
+the number of mappings of the run. For every stage it reports the number of
+items it handled, wall time, peak traced memory and the number of memory blocks
+the stage allocated that are still alive when it returns, counted from a
+tracemalloc snapshot.
+
+Usage:
+	python benchmarks/runBenchmarks.py
+	python benchmarks/runBenchmarks.py --sizes 1000 10000 --save baseline.json
+	python benchmarks/runBenchmarks.py --compare baseline.json --tolerance 0.25
+"""
+
+import argparse
+import builtins
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from typing import Callable, Dict, List
+
+ADDON_PACKAGE_DIR = os.path.join(
+	os.path.dirname(os.path.abspath(__file__)), os.pardir, "addon", "globalPlugins", "gestureDuplicate"
+)
+DEFAULT_SIZES = [1000, 10000, 100000]
+# Keys of the stage results that are compared against a baseline
+COMPARED_METRICS = ("wall_ms", "peak_kib")
+
+# --- NVDA stubs
+
+class _Stub:
+	"""Stands in for any wx class or constant the modules touch at import time."""
+
+	def __init__(self, *args, **kwargs):
+		pass
+
+class _WxModule(types.ModuleType):
+	def __getattr__(self, name):
+		return _Stub
+
+class _Log:
+	def debug(self, *args, **kwargs):
+		pass
+
+	info = warning = error = debug
+
+class _ScriptInfo:
+	__slots__ = ("className", "moduleName", "scriptName", "displayName", "gestures")
+
+	def __init__(self, module_name, class_name, script_name, gestures):
+		self.moduleName = module_name
+		self.className = class_name
+		self.scriptName = script_name
+		self.displayName = f"Do {script_name}"
+		self.gestures = gestures
+
+class _GestureManager:
+	mappings: Dict = {}
+
+	def getAllGestureMappings(self):
+		return self.mappings
+
+def _install_stubs():
+	builtins._ = lambda text: text
+	modules = {
+		"wx": _WxModule("wx"),
+		"gui": types.SimpleNamespace(mainFrame=None, messageBox=lambda *args, **kwargs: None),
+		"ui": types.SimpleNamespace(message=lambda *args, **kwargs: None),
+		"logHandler": types.SimpleNamespace(log=_Log()),
+		"inputCore": types.SimpleNamespace(
+			manager=_GestureManager(),
+			getDisplayTextForGestureIdentifier=lambda identifier: ("", identifier),
+		),
+		"config": types.SimpleNamespace(conf={"keyboard": {"keyboardLayout": "desktop"}}),
+		"addonHandler": types.SimpleNamespace(
+			initTranslation=lambda: None,
+			AddonError=Exception,
+			getAvailableAddons=lambda: iter(()),
+		),
+		"globalVars": types.SimpleNamespace(appArgs=types.SimpleNamespace(configPath=tempfile.gettempdir())),
+		"api": types.SimpleNamespace(getFocusObject=lambda: None),
+		"globalPluginHandler": types.SimpleNamespace(runningPlugins=set()),
+		"languageHandler": types.SimpleNamespace(getLanguage=lambda: "en"),
+	}
+	for name, module in modules.items():
+		sys.modules.setdefault(name, module)
+	# Load the add-on's modules as a package without running its plugin __init__
+	package = types.ModuleType("gestureDuplicate")
+	package.__path__ = [os.path.abspath(ADDON_PACKAGE_DIR)]
+	sys.modules["gestureDuplicate"] = package
+
+# --- Synthetic inputs
+
+def make_mappings(count: int, rng: random.Random) -> Dict:
+	"""Build getAllGestureMappings() style data with count scripts and some conflicts."""
+	modifiers = ["nvda", "control", "shift", "alt", "windows"]
+	keys = [chr(c) for c in range(ord("a"), ord("z") + 1)] + [f"f{i}" for i in range(1, 13)]
+	layouts = ["", "(desktop)", "(laptop)"]
+	mappings: Dict = {}
+	for i in range(count):
+		category = f"category{i % 50}"
+		if i % 3:
+			module_name, class_name = f"globalPlugins.addon{i % 400}", "GlobalPlugin"
+		else:
+			module_name, class_name = f"appModules.app{i % 200}", "AppModule"
+		mods = rng.sample(modifiers, rng.randint(1, 3))
+		gesture = f"kb{rng.choice(layouts)}:{'+'.join(mods)}+{rng.choice(keys)}"
+		mappings.setdefault(category, {})[f"script{i}"] = _ScriptInfo(
+			module_name, class_name, f"script{i}", [gesture]
+		)
+	return mappings
+
+def make_gestures_ini(sections: int, rng: random.Random) -> bytes:
+	lines = []
+	for i in range(sections):
+		owner = f"globalPlugins.addon{i}.GlobalPlugin" if i % 4 else f"appModules.app{i}.AppModule"
+		lines.append(f"[{owner}]")
+		for j in range(rng.randint(1, 8)):
+			lines.append(f"\tkb:nvda+shift+{chr(ord('a') + j)} = script{j}")
+	return ("\n".join(lines) + "\n").encode("utf-8")
+
+def make_nvda_ini(target_bytes: int, rng: random.Random) -> str:
+	lines = []
+	size = 0
+	i = 0
+	while size < target_bytes:
+		lines.append(f"[section{i}]")
+		for j in range(rng.randint(5, 40)):
+			line = f"\tkey{j} = {'x' * rng.randint(1, 60)}"
+			lines.append(line)
+			size += len(line) + 1
+		if i % 5 == 0:
+			lines.append(f"\t[[nested{i}]]")
+			lines.append("\t\tvalue = True")
+		i += 1
+	return "\n".join(lines) + "\n"
+
+# --- Measurement
+
+def measure(func: Callable[[], object], repeat: int = 3) -> Dict[str, float]:
+	"""Return the best wall time of func, its peak traced memory and its allocations.
+	Allocations are the blocks traced while func ran that are still alive when it
+	returns, result included; tracemalloc's own bookkeeping is left out.
+	"""
+	best = float("inf")
+	for _i in range(repeat):
+		gc.collect()
+		start = time.perf_counter_ns()
+		func()
+		best = min(best, time.perf_counter_ns() - start)
+
+	gc.collect()
+	tracemalloc.start()
+	result = func()
+	_current, peak = tracemalloc.get_traced_memory()
+	snapshot = tracemalloc.take_snapshot().filter_traces((
+		tracemalloc.Filter(False, tracemalloc.__file__),
+	))
+	tracemalloc.stop()
+	allocations = sum(stat.count for stat in snapshot.statistics("filename"))
+	del result
+	return {
+		"wall_ms": round(best / 1e6, 3),
+		"peak_kib": round(peak / 1024, 1),
+		"allocations": allocations,
+	}
+
+def run(sizes: List[int], seed: int) -> Dict[str, Dict[str, float]]:
+	_install_stubs()
+	results: Dict[str, Dict[str, float]] = {}
+	with tempfile.TemporaryDirectory(prefix="gestureDuplicateBench") as work_dir:
+		for size in sizes:
+			_run_size(size, seed, work_dir, results)
+	return results
+
+def _record(results: Dict[str, Dict[str, float]], stage: str, size: int, count: int, func: Callable[[], object]):
+	"""Measure func as stage of the run with size mappings; count is the number of items it handles."""
+	metrics = measure(func)
+	metrics["count"] = count
+	results[f"{stage}[{size}]"] = metrics
+
+def _run_size(size: int, seed: int, work_dir: str, results: Dict[str, Dict[str, float]]):
+	import inputCore
+	from gestureDuplicate import CheckDuplicateGestures, analysis
+	from gestureDuplicate.conflictGraph import ConflictGraph
+	from gestureDuplicate.resolution import ResolutionTable
+	from gestureDuplicate.tokenIndex import TokenIndex
+	from gestureDuplicate.iniTransaction import GesturesIniTransaction
+
+	rng = random.Random(seed)
+
+	inputCore.manager.mappings = make_mappings(size, rng)
+	_record(results, "find_duplicates", size, size, CheckDuplicateGestures.find_duplicate_gestures_data)
+	duplicates = CheckDuplicateGestures.find_duplicate_gestures_data()
+	_record(results, "conflict_graph", size, len(duplicates), lambda: ConflictGraph(duplicates))
+	graph = ConflictGraph(duplicates)
+	_record(results, "resolution", size, len(graph.nodes), lambda: ResolutionTable(graph))
+	texts = [(item.gesture, item.display_name, item.class_name) for item in duplicates]
+	_record(results, "filter_index", size, len(texts), lambda: TokenIndex(texts).match("nvda shift scr"))
+
+	sections = max(size // 10, 1)
+	ini_data = make_gestures_ini(sections, rng)
+	installed = {f"addon{i}" for i in range(0, sections, 2)}
+	_record(
+		results, "gestures_ini_load", size, sections, lambda: analysis.load_addon_gestures(ini_data, installed)
+	)
+
+	ini_path = os.path.join(work_dir, "gestures.ini")
+	records = analysis.load_addon_gestures(ini_data, installed)
+	to_remove = records[::10]
+
+	def remove():
+		with open(ini_path, "wb") as f:
+			f.write(ini_data)
+		transaction = GesturesIniTransaction(ini_path)
+		for g in to_remove:
+			transaction.queue_removal(g.section, g.gesture, g.script)
+		transaction.commit()
+
+	_record(results, "gestures_ini_remove", size, len(to_remove), remove)
+
+	with open(ini_path, "wb") as f:
+		f.write(ini_data)
+	removals: Dict = {}
+	for g in to_remove:
+		removals.setdefault((g.section, g.gesture), set()).add(g.script)
+	preview_transaction = GesturesIniTransaction(ini_path)
+	_record(
+		results, "gestures_ini_preview", size, len(to_remove), lambda: preview_transaction.preview(removals)
+	)
+
+	nvda_ini = make_nvda_ini(size * 50, rng)
+	known = {f"section{i}" for i in range(0, size, 3)}
+	nvda_ini_data = nvda_ini.encode("utf-8")
+	_record(
+		results, "config_footprint", size, len(nvda_ini_data) // 1024,
+		lambda: analysis.measure_config_sections(nvda_ini_data, known, installed)
+	)
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+	"""Return a description of every metric that got worse than the baseline allows.
+	Stages measured on one side only and item counts that changed are reported too,
+	since the results can then not be compared.
+	"""
+	regressions = []
+	for stage in baseline:
+		if stage not in results:
+			regressions.append(f"{stage}: not measured, but in the baseline")
+	for stage, metrics in results.items():
+		base = baseline.get(stage)
+		if not base:
+			regressions.append(f"{stage}: not in the baseline")
+			continue
+		if base.get("count") != metrics.get("count"):
+			regressions.append(f"{stage} count: {base.get('count')} -> {metrics.get('count')}")
+		for metric in COMPARED_METRICS:
+			old, new = base.get(metric), metrics.get(metric)
+			if old and new and new > old * (1 + tolerance):
+				regressions.append(f"{stage} {metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+	return regressions
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="number of mappings per run")
+	parser.add_argument("--seed", type=int, default=2026)
+	parser.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+	parser.add_argument("--compare", metavar="FILE", help="fail if results regress against this baseline")
+	parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+	args = parser.parse_args(argv)
+
+	results = run(args.sizes, args.seed)
+	width = max(len(stage) for stage in results)
+	print(f"{'stage'.ljust(width)}  {'count':>8}  {'wall ms':>10}  {'peak KiB':>10}  {'allocs':>10}")
+	for stage, metrics in results.items():
+		print(
+			f"{stage.ljust(width)}  {metrics['count']:>8}  {metrics['wall_ms']:>10}  {metrics['peak_kib']:>10}"
+			f"  {metrics['allocations']:>10}"
+		)
+
+	if args.save:
+		with open(args.save, "w", encoding="utf-8") as f:
+			json.dump(results, f, indent="\t", sort_keys=True)
+		print(f"Baseline saved to {args.save}")
+
+	if args.compare:
+		with open(args.compare, encoding="utf-8") as f:
+			baseline = json.load(f)
+		regressions = compare(results, baseline, args.tolerance)
+		if regressions:
+			print("Regressions:")
+			for line in regressions:
+				print(f"  {line}")
+			return 1
+		print("No regressions.")
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,16 @@
+# conftest.py
+# Loads the add-on's NVDA-free modules as the gestureDuplicate package, without
+# running its plugin __init__, so they can be tested outside NVDA.
+
+import os
+import sys
+import types
+
+PACKAGE_DIR = os.path.join(
+	os.path.dirname(os.path.abspath(__file__)), os.pardir, "addon", "globalPlugins", "gestureDuplicate"
+)
+
+if "gestureDuplicate" not in sys.modules:
+	package = types.ModuleType("gestureDuplicate")
+	package.__path__ = [os.path.abspath(PACKAGE_DIR)]
+	sys.modules["gestureDuplicate"] = package
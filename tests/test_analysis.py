@@ -0,0 +1,55 @@
+# test_analysis.py
+
+from types import SimpleNamespace
+from gestureDuplicate.analysis import find_duplicates, find_unknown_keys, mappings_fingerprint, snapshot_from_entries
+
+def script(module_name, class_name, gestures, display_name="Script"):
+	return SimpleNamespace(
+		moduleName=module_name, className=class_name, displayName=display_name, gestures=gestures
+	)
+
+def test_snapshot_sections_and_skips_scripts_without_gestures():
+	entries = [
+		("Tools", "one", script("globalPlugins.alpha", "GlobalPlugin", ["kb:nvda+a"])),
+		("Tools", "none", script("globalPlugins.alpha", "GlobalPlugin", [])),
+		("Apps", "two", script("appModules.notepad", "appModules.notepad.AppModule", ["kb:nvda+b"])),
+	]
+	assert snapshot_from_entries(entries) == [
+		("Tools", "one", "globalPlugins.alpha.GlobalPlugin", "Script", ("kb:nvda+a",)),
+		("Apps", "two", "appModules.notepad.AppModule", "Script", ("kb:nvda+b",)),
+	]
+
+def test_duplicates_ignore_layout_and_key_order():
+	snapshot = snapshot_from_entries([
+		("Tools", "one", script("globalPlugins.alpha", "GlobalPlugin", ["kb(laptop):shift+nvda+a"])),
+		("Tools", "two", script("globalPlugins.beta", "GlobalPlugin", ["kb:NVDA+shift+a"])),
+		("Tools", "three", script("globalPlugins.beta", "GlobalPlugin", ["kb:nvda+z"])),
+	])
+	duplicates = find_duplicates(snapshot)
+	assert sorted(item.script_name for item in duplicates) == ["one", "two"]
+	assert {item.norm_gesture for item in duplicates} == {"kb:a+nvda+shift"}
+
+def test_unknown_keys_skip_driver_sections_matched_by_many():
+	spec = {
+		"general": {"language": "string", "sub": {"x": "integer"}},
+		"speech": {"synth": "string", "__many__": {"rate": "integer"}},
+	}
+	profile = {
+		"general": {"language": "en", "stale": "1", "sub": {"x": "1", "old": "2"}, "gone": {"y": "3"}},
+		"speech": {"synth": "espeak", "oneCore": {"rate": "50", "voice": "David"}},
+		"orphan": {"z": "4"},
+	}
+	found = {(item.path, item.key, item.is_section) for item in find_unknown_keys(profile, spec)}
+	assert found == {
+		(("general",), "stale", False),
+		(("general", "sub"), "old", False),
+		(("general",), "gone", True),
+	}
+
+def test_fingerprint_changes_with_braille_display_and_vision_providers():
+	def fingerprint(display, providers):
+		return mappings_fingerprint((1, 2), ("addon",), ["b", "a"], ("Editor",), display, providers)
+	base = fingerprint("alva", ["screenCurtain", "NVDAHighlighter"])
+	assert base == fingerprint("alva", ["NVDAHighlighter", "screenCurtain"])
+	assert base != fingerprint("hims", ["screenCurtain", "NVDAHighlighter"])
+	assert base != fingerprint("alva", ["screenCurtain"])
@@ -0,0 +1,59 @@
+# test_configPatches.py
+
+from gestureDuplicate.analysis import (
+	build_key_removal_patches, build_section_removal_patches, iter_config_section_ranges,
+)
+from gestureDuplicate.gesturesIni import apply_patches
+
+NVDA_INI = (
+	b"\xef\xbb\xbfschemaVersion = 2\n"
+	b"[general]\n"
+	b"\tlanguage = en\n"
+	b"\t[[sub]]\n"
+	b"\t\tx = 1\n"
+	b"\t\t[[[deep]]]\n"
+	b"\t\t\ty = 2\n"
+	b"\t[[other]]\n"
+	b"\t\tz = 3\n"
+	b"[orphan]\n"
+	b"\t\"quoted key\" = 1\n"
+	b"[speech]\n"
+	b"\tsynth = espeak"
+)
+
+def test_section_ranges_cover_subsections_and_keep_bom():
+	ranges = list(iter_config_section_ranges(NVDA_INI))
+	assert [name for name, _start, _end in ranges] == ["general", "orphan", "speech"]
+	start, end = ranges[0][1:]
+	assert NVDA_INI[start:end].startswith(b"[general]\n")
+	assert NVDA_INI[start:end].endswith(b"\t\tz = 3\n")
+
+def test_section_removal():
+	result = apply_patches(NVDA_INI, build_section_removal_patches(NVDA_INI, {"orphan", "speech"}))
+	assert result.startswith(b"\xef\xbb\xbfschemaVersion = 2\n")
+	assert result.endswith(b"\t\tz = 3\n")
+
+def test_top_level_key_removal_keeps_bom():
+	result = apply_patches(NVDA_INI, build_key_removal_patches(NVDA_INI, {((), "schemaVersion")}))
+	assert result.startswith(b"\xef\xbb\xbf[general]\n")
+
+def test_nested_section_removal_stops_at_sibling():
+	result = apply_patches(NVDA_INI, build_key_removal_patches(NVDA_INI, {(("general",), "sub")}))
+	assert b"[[sub]]" not in result
+	assert b"[[[deep]]]" not in result
+	assert b"\t[[other]]\n\t\tz = 3\n" in result
+
+def test_deep_key_and_quoted_key_removal():
+	keys = {(("general", "sub", "deep"), "y"), (("orphan",), "quoted key")}
+	result = apply_patches(NVDA_INI, build_key_removal_patches(NVDA_INI, keys))
+	assert b"y = 2" not in result
+	assert b"quoted key" not in result
+	assert b"\t\t[[[deep]]]\n\t[[other]]\n" in result
+
+def test_key_of_same_name_elsewhere_is_kept():
+	result = apply_patches(NVDA_INI, build_key_removal_patches(NVDA_INI, {(("speech",), "x")}))
+	assert result == NVDA_INI
+
+def test_last_section_without_line_break():
+	result = apply_patches(NVDA_INI, build_key_removal_patches(NVDA_INI, {((), "speech")}))
+	assert result.endswith(b"\t\"quoted key\" = 1\n")
@@ -0,0 +1,42 @@
+# test_conflictIndex.py
+
+from gestureDuplicate.analysis import GestureNormalizer
+from gestureDuplicate.conflictIndex import ConflictIndex
+
+class CountingNormalizer(GestureNormalizer):
+	def __init__(self):
+		super().__init__()
+		self.calls = []
+
+	def _normalize(self, gesture):
+		self.calls.append(gesture)
+		return super()._normalize(gesture)
+
+def snapshot(display_name="Say time"):
+	return [
+		("Tools", "sayTime", "globalPlugins.clock.GlobalPlugin", display_name, ("kb:nvda+f12",)),
+		("System", "dateTime", "globalCommands.GlobalCommands", "Report time", ("kb:NVDA+f12",)),
+		("Tools", "other", "globalPlugins.other.GlobalPlugin", "Other", ("kb:nvda+f1",)),
+	]
+
+def test_changed_display_name_is_picked_up():
+	index = ConflictIndex()
+	index.update(snapshot(), GestureNormalizer())
+	index.update(snapshot("Announce time"), GestureNormalizer())
+	names = {record.display_name for record in index.duplicates()}
+	assert names == {"Announce time", "Report time"}
+
+def test_only_changed_classes_are_normalized_again():
+	index = ConflictIndex()
+	index.update(snapshot(), CountingNormalizer())
+	normalize = CountingNormalizer()
+	index.update(snapshot("Announce time"), normalize)
+	assert normalize.calls == ["kb:nvda+f12"]
+	index.update(snapshot("Announce time"), normalize)
+	assert normalize.calls == ["kb:nvda+f12"]
+
+def test_removed_class_leaves_the_conflicts():
+	index = ConflictIndex()
+	index.update(snapshot(), GestureNormalizer())
+	index.update(snapshot()[1:], GestureNormalizer())
+	assert index.duplicates() == []
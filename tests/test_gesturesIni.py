@@ -0,0 +1,54 @@
+# test_gesturesIni.py
+
+from gestureDuplicate.gesturesIni import GesturesIniIndex, apply_patches, build_removal_patches
+
+GESTURES_INI = (
+	b"\xef\xbb\xbf[globalPlugins.alpha.GlobalPlugin]\r\n"
+	b"kb:nvda+a = first\r\n"
+	b"kb:nvda+b = second, third\r\n"
+	b"[globalPlugins.beta.GlobalPlugin]\n"
+	b"# kept comment\n"
+	b"kb:nvda+c = only\n"
+	b"[appModules.notepad.AppModule]\n"
+	b'"kb:nvda+="  = equals\n'
+	b"kb:nvda+d = left"
+)
+
+def remove(data, removals):
+	return apply_patches(data, build_removal_patches(data, removals))
+
+def test_removes_whole_line():
+	result = remove(GESTURES_INI, {("globalPlugins.alpha.GlobalPlugin", "kb:nvda+a"): {"first"}})
+	assert b"kb:nvda+a" not in result
+	assert b"kb:nvda+b = second, third\r\n" in result
+	assert result.startswith(b"\xef\xbb\xbf[globalPlugins.alpha.GlobalPlugin]\r\n")
+
+def test_rewrites_line_keeping_other_scripts_and_line_break():
+	result = remove(GESTURES_INI, {("globalPlugins.alpha.GlobalPlugin", "kb:nvda+b"): {"second"}})
+	assert b"kb:nvda+b = third\r\n" in result
+	assert b"second" not in result
+
+def test_drops_header_of_emptied_section_only():
+	result = remove(GESTURES_INI, {("globalPlugins.beta.GlobalPlugin", "kb:nvda+c"): {"only"}})
+	assert b"[globalPlugins.beta.GlobalPlugin]" not in result
+	# Comments are not gestures and stay behind
+	assert b"# kept comment\n" in result
+	assert b"[appModules.notepad.AppModule]" in result
+
+def test_quoted_key_and_last_line_without_line_break():
+	section = "appModules.notepad.AppModule"
+	result = remove(GESTURES_INI, {(section, "kb:nvda+="): {"equals"}, (section, "kb:nvda+d"): {"left"}})
+	assert result.endswith(b"kb:nvda+c = only\n")
+
+def test_unknown_removals_change_nothing():
+	assert build_removal_patches(GESTURES_INI, {("globalPlugins.gamma.GlobalPlugin", "kb:x"): {"y"}}) == []
+	assert remove(GESTURES_INI, {("globalPlugins.alpha.GlobalPlugin", "kb:nvda+a"): {"other"}}) == GESTURES_INI
+
+def test_index_matches_streaming_patches():
+	index = GesturesIniIndex(GESTURES_INI)
+	removals = {
+		("globalPlugins.alpha.GlobalPlugin", "kb:nvda+a"): {"first"},
+		("globalPlugins.alpha.GlobalPlugin", "kb:nvda+b"): {"second", "third"},
+		("appModules.notepad.AppModule", "kb:nvda+d"): {"left"},
+	}
+	assert sorted(index.removal_patches(removals)) == sorted(build_removal_patches(GESTURES_INI, removals))
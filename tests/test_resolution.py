@@ -0,0 +1,42 @@
+# test_resolution.py
+
+from gestureDuplicate.conflictGraph import (
+	KIND_BRAILLE_DISPLAY, KIND_VISION_PROVIDER, SEVERITY_BENIGN, SEVERITY_SHADOWING, ConflictGraph,
+)
+from gestureDuplicate.records import GestureBinding
+from gestureDuplicate.resolution import STATUS_DEAD, STATUS_RUNS, STATUS_SHADOWED, ResolutionTable
+
+def binding(section, script_name, gesture="kb:nvda+x"):
+	return GestureBinding(gesture, gesture, "Category", script_name, section, script_name)
+
+def test_driver_and_provider_contexts():
+	graph = ConflictGraph([])
+	assert graph.context_of("brailleDisplayDrivers.alva.BrailleDisplayDriver").kind == KIND_BRAILLE_DISPLAY
+	assert graph.context_of("visionEnhancementProviders.screenCurtain.ScreenCurtainProvider").kind == (
+		KIND_VISION_PROVIDER
+	)
+
+def test_braille_display_shadows_app_module_without_killing_it():
+	display = binding("brailleDisplayDrivers.alva.BrailleDisplayDriver", "display")
+	app = binding("appModules.notepad.AppModule", "app")
+	graph = ConflictGraph([display, app])
+	table = ResolutionTable(graph)
+	assert graph.edges["kb:nvda+x"][0].first is display
+	assert graph.severity["kb:nvda+x"] == SEVERITY_SHADOWING
+	assert table.status_of(display) == STATUS_RUNS
+	# The display driver is only asked while that display is in use
+	assert table.status_of(app) == STATUS_SHADOWED
+
+def test_global_plugin_kills_global_commands():
+	plugin = binding("globalPlugins.alpha.GlobalPlugin", "plugin")
+	commands = binding("globalCommands.GlobalCommands", "commands")
+	table = ResolutionTable(ConflictGraph([plugin, commands]))
+	assert table.status_of(plugin) == STATUS_RUNS
+	assert table.status_of(commands) == STATUS_DEAD
+
+def test_different_braille_displays_are_benign():
+	graph = ConflictGraph([
+		binding("brailleDisplayDrivers.alva.BrailleDisplayDriver", "alva"),
+		binding("brailleDisplayDrivers.hims.BrailleDisplayDriver", "hims"),
+	])
+	assert graph.severity["kb:nvda+x"] == SEVERITY_BENIGN